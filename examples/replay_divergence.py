@@ -111,48 +111,48 @@ def main():
     # Use temporary directory for this example
     with tempfile.TemporaryDirectory() as tmpdir:
         db_path = os.path.join(tmpdir, "example.db")
-        store = SQLiteStore(path=db_path)
-        engine = ReplayEngine(store=store)
-
-        # Record original run
-        print("\n1. Recording run 'original'...")
-        record_run(store, "original", tool_variant="original")
-        print("   Done. Tool returns: ['a', 'b', 'c']")
-
-        # Record modified run (different tool output at step 2)
-        print("\n2. Recording run 'modified' (different tool output)...")
-        record_run(store, "modified", tool_variant="modified")
-        print("   Done. Tool returns: ['x', 'y']  <-- DIFFERENT!")
-
-        # Compare them
-        print("\n3. Comparing runs...")
-        result = engine.compare_runs("original", "modified")
-
-        # Print result
-        print("\n" + "=" * 60)
-        print(f"ReplayStatus: {result.status.value.upper()}")
-        print("=" * 60)
-
-        if result.is_diverged():
-            div = result.divergence
-            print("\nDivergence detected!")
-            print(f"  Step index: {div.step_idx}")
-            print(f"  Step name:  {div.step_name}")
-            print(f"  Reason:     {div.divergence_type}")
-
-            if div.event_idx is not None:
-                print(f"  Event index: {div.event_idx}")
-
-            print("\nField differences:")
-            for diff in div.field_diffs[:5]:  # Show first 5
-                print(f"  - {diff.path}")
-                print(f"      expected: {diff.expected}")
-                print(f"      actual:   {diff.actual}")
-
-            print(f"\nSummary: {div.summary()}")
-        else:
-            print("\n✓ Runs matched (unexpected)")
-            sys.exit(1)
+        with SQLiteStore(path=db_path) as store:
+            engine = ReplayEngine(store=store)
+
+            # Record original run
+            print("\n1. Recording run 'original'...")
+            record_run(store, "original", tool_variant="original")
+            print("   Done. Tool returns: ['a', 'b', 'c']")
+
+            # Record modified run (different tool output at step 2)
+            print("\n2. Recording run 'modified' (different tool output)...")
+            record_run(store, "modified", tool_variant="modified")
+            print("   Done. Tool returns: ['x', 'y']  <-- DIFFERENT!")
+
+            # Compare them
+            print("\n3. Comparing runs...")
+            result = engine.compare_runs("original", "modified")
+
+            # Print result
+            print("\n" + "=" * 60)
+            print(f"ReplayStatus: {result.status.value.upper()}")
+            print("=" * 60)
+
+            if result.is_diverged():
+                div = result.divergence
+                print("\nDivergence detected!")
+                print(f"  Step index: {div.step_idx}")
+                print(f"  Step name:  {div.step_name}")
+                print(f"  Reason:     {div.divergence_type}")
+
+                if div.event_idx is not None:
+                    print(f"  Event index: {div.event_idx}")
+
+                print("\nField differences:")
+                for diff in div.field_diffs[:5]:  # Show first 5
+                    print(f"  - {diff.path}")
+                    print(f"      expected: {diff.expected}")
+                    print(f"      actual:   {diff.actual}")
+
+                print(f"\nSummary: {div.summary()}")
+            else:
+                print("\n✓ Runs matched (unexpected)")
+                sys.exit(1)
 
 
 if __name__ == "__main__":
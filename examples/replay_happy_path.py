@@ -97,34 +97,34 @@ def main():
     # Use temporary directory for this example
     with tempfile.TemporaryDirectory() as tmpdir:
         db_path = os.path.join(tmpdir, "example.db")
-        store = SQLiteStore(path=db_path)
-        engine = ReplayEngine(store=store)
-
-        # Record two identical runs
-        print("\n1. Recording run 'original'...")
-        record_run(store, "original")
-        print("   Done. 4 steps recorded.")
-
-        print("\n2. Recording run 'replay' (identical)...")
-        record_run(store, "replay")
-        print("   Done. 4 steps recorded.")
-
-        # Compare them
-        print("\n3. Comparing runs...")
-        result = engine.compare_runs("original", "replay")
-
-        # Print result
-        print("\n" + "=" * 60)
-        print(f"ReplayStatus: {result.status.value.upper()}")
-        print(f"Steps compared: {result.steps_compared}")
-        print(f"Events compared: {result.total_events_compared}")
-        print("=" * 60)
-
-        if result.is_match():
-            print("\n✓ Runs are identical. Replay successful.")
-        else:
-            print(f"\n✗ Runs diverged: {result.divergence.summary()}")
-            sys.exit(1)
+        with SQLiteStore(path=db_path) as store:
+            engine = ReplayEngine(store=store)
+
+            # Record two identical runs
+            print("\n1. Recording run 'original'...")
+            record_run(store, "original")
+            print("   Done. 4 steps recorded.")
+
+            print("\n2. Recording run 'replay' (identical)...")
+            record_run(store, "replay")
+            print("   Done. 4 steps recorded.")
+
+            # Compare them
+            print("\n3. Comparing runs...")
+            result = engine.compare_runs("original", "replay")
+
+            # Print result
+            print("\n" + "=" * 60)
+            print(f"ReplayStatus: {result.status.value.upper()}")
+            print(f"Steps compared: {result.steps_compared}")
+            print(f"Events compared: {result.total_events_compared}")
+            print("=" * 60)
+
+            if result.is_match():
+                print("\n✓ Runs are identical. Replay successful.")
+            else:
+                print(f"\n✗ Runs diverged: {result.divergence.summary()}")
+                sys.exit(1)
 
 
 if __name__ == "__main__":
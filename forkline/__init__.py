@@ -1,64 +1,129 @@
-from .core import (
-    # First-divergence diffing
-    DivergenceType,
-    # Core types
-    Event,
-    FirstDivergenceResult,
-    # Redaction
-    RedactionAction,
-    RedactionRule,
-    Run,
-    Step,
-    StepSummary,
-    # Canonicalization
-    canon,
-    create_default_policy,
-    # Diff
-    diff_runs,
-    find_first_divergence,
-    json_diff,
-    sha256_hex,
-)
-from .core.redaction import RedactionPolicy
-from .core.replay import (
-    # Exceptions
-    DeterminismViolationError,
-    # Data models
-    Divergence,
-    DivergencePoint,
-    DivergenceReason,
-    FieldDiff,
-    MissingArtifactError,
-    # Engine and context
-    ReplayContext,
-    ReplayEngine,
-    ReplayError,
-    ReplayOrderError,
-    ReplayPolicy,
-    ReplayResult,
-    ReplayStatus,
-    ReplayStepResult,
-    # Replay mode guardrails
-    assert_not_in_replay_mode,
-    # Utilities
-    compare_events,
-    compare_steps,
-    deep_compare,
-    get_replay_run_id,
-    guard_live_call,
-    is_replay_mode_active,
-    # Legacy
-    replay,
-    replay_mode,
-)
-from .storage import RunRecorder, SQLiteStore
-from .tracer import Tracer
-from .version import (
-    DEFAULT_FORKLINE_VERSION,
-    DEFAULT_SCHEMA_VERSION,
-    FORKLINE_VERSION,
-    SCHEMA_VERSION,
-)
+"""Forkline: record, replay and diff agent runs.
+
+Public names are imported on first access (PEP 562), so ``import forkline``
+and the CLI only load the modules they use.
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .core import (
+        # First-divergence diffing
+        DivergenceType,
+        # Core types
+        Event,
+        FirstDivergenceResult,
+        # Redaction
+        RedactionAction,
+        RedactionRule,
+        Run,
+        Step,
+        StepSummary,
+        # Canonicalization
+        canon,
+        create_default_policy,
+        # Diff
+        diff_runs,
+        find_first_divergence,
+        json_diff,
+        sha256_hex,
+    )
+    from .core.redaction import RedactionPolicy
+    from .core.replay import (
+        # Exceptions
+        DeterminismViolationError,
+        # Data models
+        Divergence,
+        DivergencePoint,
+        DivergenceReason,
+        FieldDiff,
+        MissingArtifactError,
+        # Engine and context
+        ReplayContext,
+        ReplayEngine,
+        ReplayError,
+        ReplayOrderError,
+        ReplayPolicy,
+        ReplayResult,
+        ReplayStatus,
+        ReplayStepResult,
+        # Replay mode guardrails
+        assert_not_in_replay_mode,
+        # Utilities
+        compare_events,
+        compare_steps,
+        deep_compare,
+        get_replay_run_id,
+        guard_live_call,
+        is_replay_mode_active,
+        # Legacy
+        replay,
+        replay_mode,
+    )
+    from .storage import LogStore, RunRecorder, SQLiteStore
+    from .tracer import Tracer
+    from .version import (
+        DEFAULT_FORKLINE_VERSION,
+        DEFAULT_SCHEMA_VERSION,
+        FORKLINE_VERSION,
+        SCHEMA_VERSION,
+    )
+
+# Public name -> module defining it, relative to this package
+_LAZY_IMPORTS = {
+    "DivergenceType": "core",
+    "Event": "core",
+    "FirstDivergenceResult": "core",
+    "RedactionAction": "core",
+    "RedactionRule": "core",
+    "Run": "core",
+    "Step": "core",
+    "StepSummary": "core",
+    "canon": "core",
+    "create_default_policy": "core",
+    "diff_runs": "core",
+    "find_first_divergence": "core",
+    "json_diff": "core",
+    "sha256_hex": "core",
+    "RedactionPolicy": "core.redaction",
+    "DeterminismViolationError": "core.replay",
+    "Divergence": "core.replay",
+    "DivergencePoint": "core.replay",
+    "DivergenceReason": "core.replay",
+    "FieldDiff": "core.replay",
+    "MissingArtifactError": "core.replay",
+    "ReplayContext": "core.replay",
+    "ReplayEngine": "core.replay",
+    "ReplayError": "core.replay",
+    "ReplayOrderError": "core.replay",
+    "ReplayPolicy": "core.replay",
+    "ReplayResult": "core.replay",
+    "ReplayStatus": "core.replay",
+    "ReplayStepResult": "core.replay",
+    "assert_not_in_replay_mode": "core.replay",
+    "compare_events": "core.replay",
+    "compare_steps": "core.replay",
+    "deep_compare": "core.replay",
+    "get_replay_run_id": "core.replay",
+    "guard_live_call": "core.replay",
+    "is_replay_mode_active": "core.replay",
+    "replay": "core.replay",
+    "replay_mode": "core.replay",
+    "LogStore": "storage",
+    "RunRecorder": "storage",
+    "SQLiteStore": "storage",
+    "Tracer": "tracer",
+    "DEFAULT_FORKLINE_VERSION": "version",
+    "DEFAULT_SCHEMA_VERSION": "version",
+    "FORKLINE_VERSION": "version",
+    "SCHEMA_VERSION": "version",
+}
+
+# Subpackages and modules reachable as attributes, as with eager imports
+_SUBMODULES = frozenset({"cli", "core", "storage", "tracer", "version"})
 
 __all__ = [
     # Version
@@ -73,6 +138,7 @@ __all__ = [
     # Storage
     "Tracer",
     "SQLiteStore",
+    "LogStore",
     "RunRecorder",
     # Canonicalization
     "canon",
@@ -120,3 +186,19 @@ __all__ = [
     # Legacy
     "replay",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_IMPORTS.get(name)
+    if module is not None:
+        value = getattr(importlib.import_module("." + module, __name__), name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module("." + name, __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__) | _SUBMODULES)
@@ -5,6 +5,7 @@ Entry point for the ``forkline`` command-line tool.
 Usage:
     forkline diff --first <run_a> <run_b> [--window N] [--format json|text]
                   [--show input|output|both] [--canon strict] [--db PATH]
+                  [--db-b PATH]
 """
 
 from __future__ import annotations
@@ -14,6 +15,7 @@ import json
 import sys
 
 from .core.first_divergence import DivergenceType, find_first_divergence
+from .storage.codec import dumps_display
 from .storage.store import SQLiteStore
 
 # ---------------------------------------------------------------------------
@@ -21,78 +23,75 @@ from .storage.store import SQLiteStore
 # ---------------------------------------------------------------------------
 
 
+# Diff operations shown per section and the width of each rendered value
+_MAX_DIFF_OPS = 10
+_MAX_VALUE_LEN = 40
+
+
+def _truncate(text: str) -> str:
+    if len(text) > _MAX_VALUE_LEN:
+        return text[: _MAX_VALUE_LEN - 3] + "..."
+    return text
+
+
 def _compact_value(op: dict) -> str:
-    if op["op"] == "replace":
-        old = json.dumps(op.get("old"), default=str)
-        new = json.dumps(op.get("new"), default=str)
-        if len(old) > 40:
-            old = old[:37] + "..."
-        if len(new) > 40:
-            new = new[:37] + "..."
+    kind = op["op"]
+    if kind == "replace":
+        old = _truncate(dumps_display(op.get("old")))
+        new = _truncate(dumps_display(op.get("new")))
         return f"{old} -> {new}"
-    if op["op"] == "add":
-        val = json.dumps(op.get("value"), default=str)
-        if len(val) > 40:
-            val = val[:37] + "..."
-        return val
-    if op["op"] == "remove":
-        val = json.dumps(op.get("old"), default=str)
-        if len(val) > 40:
-            val = val[:37] + "..."
-        return val
+    if kind == "add":
+        return _truncate(dumps_display(op.get("value")))
+    if kind == "remove":
+        return _truncate(dumps_display(op.get("old")))
     return ""
 
 
+def _format_step(label: str, s) -> str:
+    return (
+        f"  {label} step {s.idx} '{s.name}':\n"
+        f"    input_hash:  {s.input_hash[:16]}...\n"
+        f"    output_hash: {s.output_hash[:16]}...\n"
+        f"    events: {s.event_count}\n"
+        f"    has_error: {s.has_error}\n"
+    )
+
+
+def _format_diff(title: str, ops: list) -> str:
+    parts = [f"  {title} diff:"]
+    parts.extend(
+        f"    {op['op']} {op['path']}: {_compact_value(op)}"
+        for op in ops[:_MAX_DIFF_OPS]
+    )
+    if len(ops) > _MAX_DIFF_OPS:
+        parts.append(f"    ... and {len(ops) - _MAX_DIFF_OPS} more operations")
+    parts.append("")
+    return "\n".join(parts) + "\n"
+
+
 def _format_text(result) -> str:
-    lines: list[str] = []
-    lines.append(f"First divergence: {result.status}")
-    lines.append(f"  {result.explanation}")
-    lines.append("")
+    parts = [f"First divergence: {result.status}\n  {result.explanation}\n\n"]
 
     if result.old_step:
-        s = result.old_step
-        lines.append(f"  Run A step {s.idx} '{s.name}':")
-        lines.append(f"    input_hash:  {s.input_hash[:16]}...")
-        lines.append(f"    output_hash: {s.output_hash[:16]}...")
-        lines.append(f"    events: {s.event_count}")
-        lines.append(f"    has_error: {s.has_error}")
-        lines.append("")
-
+        parts.append(_format_step("Run A", result.old_step) + "\n")
     if result.new_step:
-        s = result.new_step
-        lines.append(f"  Run B step {s.idx} '{s.name}':")
-        lines.append(f"    input_hash:  {s.input_hash[:16]}...")
-        lines.append(f"    output_hash: {s.output_hash[:16]}...")
-        lines.append(f"    events: {s.event_count}")
-        lines.append(f"    has_error: {s.has_error}")
-        lines.append("")
+        parts.append(_format_step("Run B", result.new_step) + "\n")
 
     if result.input_diff:
-        lines.append("  Input diff:")
-        for op in result.input_diff[:10]:
-            lines.append(f"    {op['op']} {op['path']}: {_compact_value(op)}")
-        if len(result.input_diff) > 10:
-            lines.append(f"    ... and {len(result.input_diff) - 10} more operations")
-        lines.append("")
-
+        parts.append(_format_diff("Input", result.input_diff))
     if result.output_diff:
-        lines.append("  Output diff:")
-        for op in result.output_diff[:10]:
-            lines.append(f"    {op['op']} {op['path']}: {_compact_value(op)}")
-        if len(result.output_diff) > 10:
-            lines.append(f"    ... and {len(result.output_diff) - 10} more operations")
-        lines.append("")
+        parts.append(_format_diff("Output", result.output_diff))
 
-    lines.append(f"  Last equal: step {result.last_equal_idx}")
+    parts.append(f"  Last equal: step {result.last_equal_idx}")
 
     if result.context_a:
         ctx = ", ".join(f"step {s.idx} '{s.name}'" for s in result.context_a)
-        lines.append(f"  Context A: [{ctx}]")
+        parts.append(f"\n  Context A: [{ctx}]")
     if result.context_b:
         ctx = ", ".join(f"step {s.idx} '{s.name}'" for s in result.context_b)
-        lines.append(f"  Context B: [{ctx}]")
+        parts.append(f"\n  Context B: [{ctx}]")
 
-    return "\n".join(lines)
+    return "".join(parts)
 
 
 # ---------------------------------------------------------------------------
@@ -100,18 +99,18 @@ def _format_text(result) -> str:
 # ---------------------------------------------------------------------------
 
 
-def _cmd_diff(args: argparse.Namespace) -> None:
-    store = SQLiteStore(path=args.db)
-
-    run_a = store.load_run(args.run_a)
-    if run_a is None:
-        print(f"Error: run '{args.run_a}' not found in {args.db}", file=sys.stderr)
+def _load_run_or_exit(path: str, run_id: str):
+    with SQLiteStore(path=path) as store:
+        run = store.load_run(run_id)
+    if run is None:
+        print(f"Error: run '{run_id}' not found in {path}", file=sys.stderr)
         sys.exit(1)
+    return run
 
-    run_b = store.load_run(args.run_b)
-    if run_b is None:
-        print(f"Error: run '{args.run_b}' not found in {args.db}", file=sys.stderr)
-        sys.exit(1)
+
+def _cmd_diff(args: argparse.Namespace) -> None:
+    run_a = _load_run_or_exit(args.db, args.run_a)
+    run_b = _load_run_or_exit(args.db_b or args.db, args.run_b)
 
     result = find_first_divergence(
         run_a,
@@ -176,6 +175,11 @@ def main(argv: list[str] | None = None) -> None:
         default="forkline.db",
         help="Path to SQLite database (default: forkline.db)",
     )
+    diff_parser.add_argument(
+        "--db-b",
+        default=None,
+        help="Database holding run_b, if not the same as --db",
+    )
     diff_parser.set_defaults(func=_cmd_diff)
 
     args = parser.parse_args(argv)
@@ -1,51 +1,121 @@
-"""Core types and logic for Forkline."""
-
-from .canon import bytes_preview, canon, sha256_hex
-from .diff import diff_runs
-from .first_divergence import (
-    DivergenceType,
-    FirstDivergenceResult,
-    StepSummary,
-    find_first_divergence,
-)
-from .json_diff import json_diff
-from .redaction import (
-    RedactionAction,
-    RedactionPolicy,
-    RedactionRule,
-    create_default_policy,
-)
-from .replay import (
-    # Exceptions
-    DeterminismViolationError,
-    # Data models
-    Divergence,
-    DivergencePoint,
-    DivergenceReason,
-    FieldDiff,
-    MissingArtifactError,
-    # Engine and context
-    ReplayContext,
-    ReplayEngine,
-    ReplayError,
-    ReplayOrderError,
-    ReplayPolicy,
-    ReplayResult,
-    ReplayStatus,
-    ReplayStepResult,
-    # Replay mode guardrails
-    assert_not_in_replay_mode,
-    compare_events,
-    compare_steps,
-    deep_compare,
-    get_replay_run_id,
-    guard_live_call,
-    is_replay_mode_active,
-    # Legacy
-    replay,
-    replay_mode,
+"""Core types and logic for Forkline.
+
+Public names are imported from their submodules on first access (PEP 562),
+so importing one piece of forkline.core does not load the rest. In
+particular the CLI does not pay for the replay engine or redaction.
+"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .canon import bytes_preview, canon, sha256_hex
+    from .diff import diff_runs
+    from .first_divergence import (
+        DivergenceType,
+        FirstDivergenceResult,
+        StepSummary,
+        find_first_divergence,
+    )
+    from .json_diff import json_diff
+    from .redaction import (
+        RedactionAction,
+        RedactionPolicy,
+        RedactionRule,
+        create_default_policy,
+    )
+    from .replay import (
+        # Exceptions
+        DeterminismViolationError,
+        # Data models
+        Divergence,
+        DivergencePoint,
+        DivergenceReason,
+        FieldDiff,
+        MissingArtifactError,
+        # Engine and context
+        ReplayContext,
+        ReplayEngine,
+        ReplayError,
+        ReplayOrderError,
+        ReplayPolicy,
+        ReplayResult,
+        ReplayStatus,
+        ReplayStepResult,
+        # Replay mode guardrails
+        assert_not_in_replay_mode,
+        compare_events,
+        compare_steps,
+        deep_compare,
+        get_replay_run_id,
+        guard_live_call,
+        is_replay_mode_active,
+        # Legacy
+        replay,
+        replay_mode,
+    )
+    from .types import Event, Run, Step
+
+# Public name -> submodule defining it
+_LAZY_IMPORTS = {
+    "bytes_preview": "canon",
+    "canon": "canon",
+    "sha256_hex": "canon",
+    "diff_runs": "diff",
+    "DivergenceType": "first_divergence",
+    "FirstDivergenceResult": "first_divergence",
+    "StepSummary": "first_divergence",
+    "find_first_divergence": "first_divergence",
+    "json_diff": "json_diff",
+    "RedactionAction": "redaction",
+    "RedactionPolicy": "redaction",
+    "RedactionRule": "redaction",
+    "create_default_policy": "redaction",
+    "DeterminismViolationError": "replay",
+    "Divergence": "replay",
+    "DivergencePoint": "replay",
+    "DivergenceReason": "replay",
+    "FieldDiff": "replay",
+    "MissingArtifactError": "replay",
+    "ReplayContext": "replay",
+    "ReplayEngine": "replay",
+    "ReplayError": "replay",
+    "ReplayOrderError": "replay",
+    "ReplayPolicy": "replay",
+    "ReplayResult": "replay",
+    "ReplayStatus": "replay",
+    "ReplayStepResult": "replay",
+    "assert_not_in_replay_mode": "replay",
+    "compare_events": "replay",
+    "compare_steps": "replay",
+    "deep_compare": "replay",
+    "get_replay_run_id": "replay",
+    "guard_live_call": "replay",
+    "is_replay_mode_active": "replay",
+    "replay": "replay",
+    "replay_mode": "replay",
+    "Event": "types",
+    "Run": "types",
+    "Step": "types",
+}
+
+# Submodules reachable as attributes, as with eager imports. Names that
+# are also public functions (canon, replay, ...) resolve to the function.
+_SUBMODULES = frozenset(
+    {
+        "canon",
+        "diff",
+        "first_divergence",
+        "json_diff",
+        "redaction",
+        "replay",
+        "types",
+    }
 )
-from .types import Event, Run, Step
 
 __all__ = [
     # Core types
@@ -99,3 +169,34 @@ __all__ = [
     # Legacy
     "replay",
 ]
+
+
+# Public functions that share their submodule's name. Importing the
+# submodule would otherwise bind the module over the function here.
+_SHADOWED = frozenset(name for name, module in _LAZY_IMPORTS.items() if module == name)
+
+
+class _CoreModule(ModuleType):
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in _SHADOWED and isinstance(value, ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_IMPORTS.get(name)
+    if module is not None:
+        value = getattr(importlib.import_module("." + module, __name__), name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module("." + name, __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__) | _SUBMODULES)
+
+
+sys.modules[__name__].__class__ = _CoreModule
@@ -18,7 +18,10 @@ import hashlib
 import json
 import math
 import unicodedata
-from typing import Any
+from typing import Any, Callable, Dict, List
+
+# Bound once: sha256_hex() runs several times per step during diffing
+_sha256 = hashlib.sha256
 
 
 def canon(value: Any, profile: str = "strict") -> bytes:
@@ -41,7 +44,30 @@ def canon(value: Any, profile: str = "strict") -> bytes:
 
 def sha256_hex(data: bytes) -> str:
     """Compute SHA-256 hex digest of bytes."""
-    return hashlib.sha256(data).hexdigest()
+    return _sha256(data).hexdigest()
+
+
+class CanonListHasher:
+    """Incremental ``sha256_hex(canon(items))`` for a list built item by item.
+
+    canon() of a list is ``[`` + comma-joined canonical items + ``]``, so the
+    digest can be fed one item at a time without keeping the list around.
+    """
+
+    def __init__(self) -> None:
+        self._hasher = _sha256(b"[")
+        self._empty = True
+
+    def update(self, item: Any) -> None:
+        if not self._empty:
+            self._hasher.update(b",")
+        self._hasher.update(_canon_json(item).encode("utf-8"))
+        self._empty = False
+
+    def hexdigest(self) -> str:
+        hasher = self._hasher.copy()
+        hasher.update(b"]")
+        return hasher.hexdigest()
 
 
 def bytes_preview(data: bytes, max_len: int = 16) -> str:
@@ -51,12 +77,22 @@ def bytes_preview(data: bytes, max_len: int = 16) -> str:
 
 
 def _canon_str(s: str) -> str:
-    s = unicodedata.normalize("NFC", s)
-    s = s.replace("\r\n", "\n").replace("\r", "\n")
+    # ASCII text is already NFC, and most strings hold no carriage return;
+    # both checks are single C-level scans, cheaper than the work they skip
+    if not s.isascii():
+        # Not memoized: normalize() returns already-NFC input after a quick
+        # check that costs less than an lru_cache lookup
+        s = unicodedata.normalize("NFC", s)
+    if "\r" in s:
+        # Two C-level replaces beat a compiled r"\r\n?" substitution, and
+        # the second returns s itself (no copy) when no lone "\r" is left
+        s = s.replace("\r\n", "\n").replace("\r", "\n")
     return s
 
 
 def _canon_json(value: Any) -> str:
+    # ensure_ascii=False is kept for all inputs: both settings run in the C
+    # encoder, and ASCII-only output encodes to identical bytes either way
     return json.dumps(
         _normalize_value(value),
         sort_keys=True,
@@ -65,7 +101,67 @@ def _canon_json(value: Any) -> str:
     )
 
 
+def _normalize_float(value: float) -> Any:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "Infinity" if value > 0 else "-Infinity"
+    # 17 significant digits round-trip every finite double exactly, so the
+    # only change left to make is collapsing -0.0
+    if value == 0.0:
+        return 0.0
+    return float(value)
+
+
+def _normalize_bytes(value: bytes) -> Dict[str, Any]:
+    return {"__bytes__": True, "sha256": sha256_hex(value), "length": len(value)}
+
+
+def _normalize_dict(value: Dict[Any, Any]) -> Dict[str, Any]:
+    # No sort here: _canon_json() serializes with sort_keys=True. When two
+    # keys stringify alike, the later one wins, as with a stable sort.
+    return {
+        (k if type(k) is str else str(k)): (
+            v if type(v) in _PASSTHROUGH_TYPES else _normalize_value(v)
+        )
+        for k, v in value.items()
+    }
+
+
+def _normalize_sequence(value: Any) -> List[Any]:
+    return [v if type(v) in _PASSTHROUGH_TYPES else _normalize_value(v) for v in value]
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+# Leaf types that canonicalize to themselves. Containers copy these
+# inline instead of calling _normalize_value() once per leaf.
+_PASSTHROUGH_TYPES = frozenset({type(None), bool, int})
+
+
+# Specialized normalizer per exact type. Payloads are plain JSON-like data,
+# so one dict lookup replaces walking the isinstance chain for every node.
+# Subclasses (IntEnum, OrderedDict, ...) miss the table and take the
+# generic path below, which yields the same result.
+_NORMALIZERS: Dict[type, Callable[[Any], Any]] = {
+    type(None): _identity,
+    bool: _identity,
+    int: _identity,
+    float: _normalize_float,
+    str: _canon_str,
+    bytes: _normalize_bytes,
+    dict: _normalize_dict,
+    list: _normalize_sequence,
+    tuple: _normalize_sequence,
+}
+
+
 def _normalize_value(value: Any) -> Any:
+    normalizer = _NORMALIZERS.get(type(value))
+    if normalizer is not None:
+        return normalizer(value)
     if value is None:
         return None
     if isinstance(value, bool):
@@ -73,23 +169,13 @@ def _normalize_value(value: Any) -> Any:
     if isinstance(value, int):
         return value
     if isinstance(value, float):
-        if math.isnan(value):
-            return "NaN"
-        if math.isinf(value):
-            return "Infinity" if value > 0 else "-Infinity"
-        normalized = float(f"{value:.17g}")
-        if normalized == 0.0:
-            normalized = 0.0
-        return normalized
+        return _normalize_float(value)
     if isinstance(value, str):
         return _canon_str(value)
     if isinstance(value, bytes):
-        return {"__bytes__": True, "sha256": sha256_hex(value), "length": len(value)}
+        return _normalize_bytes(value)
     if isinstance(value, dict):
-        return {
-            str(k): _normalize_value(v)
-            for k, v in sorted(value.items(), key=lambda x: str(x[0]))
-        }
+        return _normalize_dict(value)
     if isinstance(value, (list, tuple)):
-        return [_normalize_value(v) for v in value]
+        return _normalize_sequence(value)
     return str(value)
@@ -6,7 +6,7 @@ from typing import List
 from .types import Run
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DiffResult:
     same: bool
     notes: List[str]
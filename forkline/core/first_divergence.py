@@ -34,7 +34,7 @@ class DivergenceType:
     ERROR_DIVERGENCE = "error_divergence"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class StepSummary:
     """Compact summary of a step for inclusion in diff results."""
 
@@ -56,7 +56,7 @@ class StepSummary:
         }
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FirstDivergenceResult:
     """Result of first-divergence comparison between two runs."""
 
@@ -97,38 +97,117 @@ def _step_events_by_type(step: Step, event_type: str) -> List[Dict[str, Any]]:
     return [e.payload for e in step.events if e.type == event_type]
 
 
-def _step_input_hash(step: Step) -> str:
-    return sha256_hex(canon(_step_events_by_type(step, "input")))
-
-
-def _step_output_hash(step: Step) -> str:
-    return sha256_hex(canon(_step_events_by_type(step, "output")))
-
-
-def _step_has_error(step: Step) -> bool:
-    return any(e.type == "error" for e in step.events)
+def _payloads_digest(
+    payloads: List[Dict[str, Any]],
+    digests: Optional[Dict[Tuple[int, ...], str]] = None,
+) -> str:
+    """sha256 of canon(payloads), reusing digests by payload identity.
 
+    Steps built from the same payload objects (copied or replayed events)
+    share one entry in *digests*, so their payloads are hashed once. The
+    caller must keep the payloads alive and unmodified while *digests*
+    is in use, since keys are object ids.
 
-def _step_signature(step: Step) -> Tuple[str, str]:
-    """Soft signature for resync: (name, input_hash)."""
-    return (step.name, _step_input_hash(step))
+    The list is canonicalized in one piece rather than streamed per item
+    through CanonListHasher: an extra json.dumps() call per payload costs
+    more than the copy it saves for the few payloads a step holds.
+    """
+    if digests is None:
+        return sha256_hex(canon(payloads))
+    key = tuple(map(id, payloads))
+    digest = digests.get(key)
+    if digest is None:
+        digest = digests[key] = sha256_hex(canon(payloads))
+    return digest
+
+
+class _StepMemo:
+    """Per-call memo of step payloads, digests and summaries, by step identity.
+
+    Within one find_first_divergence() call the same step is hashed by the
+    classifier, the resync search and the summaries; each value is
+    computed once, and distinct steps over the same payload objects share
+    one digest. Keys are object ids, so a memo must not outlive the runs
+    it was used with.
+    """
 
+    __slots__ = (
+        "_by_type",
+        "_input_hashes",
+        "_output_hashes",
+        "_payload_digests",
+        "_summaries",
+    )
 
-def _make_summary(step: Step) -> StepSummary:
+    def __init__(self) -> None:
+        self._by_type: Dict[int, Dict[str, List[Dict[str, Any]]]] = {}
+        self._input_hashes: Dict[int, str] = {}
+        self._output_hashes: Dict[int, str] = {}
+        self._payload_digests: Dict[Tuple[int, ...], str] = {}
+        self._summaries: Dict[int, StepSummary] = {}
+
+    def payloads(self, step: Step, event_type: str) -> List[Dict[str, Any]]:
+        """Payloads of one event type, split from step.events in one pass."""
+        by_type = self._by_type.get(id(step))
+        if by_type is None:
+            by_type = self._by_type[id(step)] = {}
+            for e in step.events:
+                by_type.setdefault(e.type, []).append(e.payload)
+        return by_type.get(event_type, [])
+
+    def has_error(self, step: Step) -> bool:
+        return bool(self.payloads(step, "error"))
+
+    def input_hash(self, step: Step) -> str:
+        if step.input_hash is not None:
+            return step.input_hash
+        digest = self._input_hashes.get(id(step))
+        if digest is None:
+            digest = _payloads_digest(
+                self.payloads(step, "input"), self._payload_digests
+            )
+            self._input_hashes[id(step)] = digest
+        return digest
+
+    def output_hash(self, step: Step) -> str:
+        if step.output_hash is not None:
+            return step.output_hash
+        digest = self._output_hashes.get(id(step))
+        if digest is None:
+            digest = _payloads_digest(
+                self.payloads(step, "output"), self._payload_digests
+            )
+            self._output_hashes[id(step)] = digest
+        return digest
+
+    def signature(self, step: Step) -> Tuple[str, str]:
+        """Soft signature for resync: (name, input_hash)."""
+        return (step.name, self.input_hash(step))
+
+    def summary(self, step: Step) -> StepSummary:
+        summary = self._summaries.get(id(step))
+        if summary is None:
+            summary = self._summaries[id(step)] = _make_summary(step, self)
+        return summary
+
+
+def _make_summary(step: Step, memo: _StepMemo) -> StepSummary:
     return StepSummary(
         idx=step.idx,
         name=step.name,
-        input_hash=_step_input_hash(step),
-        output_hash=_step_output_hash(step),
+        input_hash=memo.input_hash(step),
+        output_hash=memo.output_hash(step),
         event_count=len(step.events),
-        has_error=_step_has_error(step),
+        has_error=memo.has_error(step),
     )
 
 
-def _get_context(steps: List[Step], center: int, size: int = 2) -> List[StepSummary]:
+def _get_context(
+    steps: List[Step], center: int, size: int, memo: _StepMemo
+) -> List[StepSummary]:
     start = max(0, center - size)
     end = min(len(steps), center + size + 1)
-    return [_make_summary(steps[i]) for i in range(start, end)]
+    return [memo.summary(steps[i]) for i in range(start, end)]
 
 
 # ---------------------------------------------------------------------------
@@ -136,24 +215,44 @@ def _get_context(steps: List[Step], center: int, size: int = 2) -> List[StepSumm
 # ---------------------------------------------------------------------------
 
 
-def _classify_step_divergence(step_a: Step, step_b: Step) -> str:
+def _shares_event_payloads(step_a: Step, step_b: Step) -> bool:
+    """True if both steps hold the same event types over the same payload objects.
+
+    Identity, not ==: Python equality treats 1, 1.0 and True as equal,
+    which canonical comparison does not.
+    """
+    if len(step_a.events) != len(step_b.events):
+        return False
+    return all(
+        ea.type == eb.type and ea.payload is eb.payload
+        for ea, eb in zip(step_a.events, step_b.events)
+    )
+
+
+def _classify_step_divergence(step_a: Step, step_b: Step, memo: _StepMemo) -> str:
     if step_a.name != step_b.name:
         return DivergenceType.OP_DIVERGENCE
 
-    if _step_input_hash(step_a) != _step_input_hash(step_b):
+    # Identical stored events imply identical inputs, errors and outputs.
+    # Only valid for steps loaded unmodified from storage (see Step).
+    if step_a.events_hash is not None and step_a.events_hash == step_b.events_hash:
+        return DivergenceType.EXACT_MATCH
+
+    if _shares_event_payloads(step_a, step_b):
+        return DivergenceType.EXACT_MATCH
+
+    if memo.input_hash(step_a) != memo.input_hash(step_b):
         return DivergenceType.INPUT_DIVERGENCE
 
-    has_err_a = _step_has_error(step_a)
-    has_err_b = _step_has_error(step_b)
-    if has_err_a != has_err_b:
+    errors_a = memo.payloads(step_a, "error")
+    errors_b = memo.payloads(step_b, "error")
+    if bool(errors_a) != bool(errors_b):
         return DivergenceType.ERROR_DIVERGENCE
-    if has_err_a and has_err_b:
-        errors_a = _step_events_by_type(step_a, "error")
-        errors_b = _step_events_by_type(step_b, "error")
+    if errors_a and errors_b:
         if canon(errors_a) != canon(errors_b):
             return DivergenceType.ERROR_DIVERGENCE
 
-    if _step_output_hash(step_a) != _step_output_hash(step_b):
+    if memo.output_hash(step_a) != memo.output_hash(step_b):
         return DivergenceType.OUTPUT_DIVERGENCE
 
     # Fallback: compare all events (catches tool_call, artifact_ref, etc.)
@@ -165,6 +264,25 @@ def _classify_step_divergence(step_a: Step, step_b: Step) -> str:
     return DivergenceType.EXACT_MATCH
 
 
+def _digest_prefix_len(steps_a: List[Step], steps_b: List[Step]) -> int:
+    """Count leading step pairs that stored digests prove identical.
+
+    Same rule as the events_hash shortcut in _classify_step_divergence,
+    applied in one tight scan before the per-step classification loop.
+    Reading the attributes dominates the cost, so gathering them into
+    arrays first (to compare whole lists at once) only adds a pass.
+    """
+    n = 0
+    for step_a, step_b in zip(steps_a, steps_b):
+        digest = step_a.events_hash
+        if digest is None or digest != step_b.events_hash:
+            break
+        if step_a.name != step_b.name:
+            break
+        n += 1
+    return n
+
+
 # ---------------------------------------------------------------------------
 # Resync
 # ---------------------------------------------------------------------------
@@ -175,24 +293,41 @@ def _try_resync(
     steps_b: List[Step],
     start: int,
     window: int,
+    memo: _StepMemo,
 ) -> Optional[Tuple[int, int]]:
     """Find earliest matching signature pair within the resync window.
 
-    Iterates by increasing combined distance from *start* so that the
-    closest resync point is found first. Ties broken by smaller offset_a.
+    Picks the pair (offset_a, offset_b), other than (0, 0), with the
+    smallest combined distance from *start*. Ties broken by smaller
+    offset_a.
+
+    Run B's window is indexed by signature, so each step in either window
+    is signed at most once and each probe is a dict lookup. Probes hash
+    the (name, input_hash) tuple from the strings' cached hashes, so
+    packing signatures into integers would save nothing.
     """
-    for total_dist in range(1, 2 * window + 1):
-        for offset_a in range(min(total_dist + 1, window)):
-            offset_b = total_dist - offset_a
-            if offset_b < 0 or offset_b >= window:
-                continue
-            ia = start + offset_a
-            ib = start + offset_b
-            if ia >= len(steps_a) or ib >= len(steps_b):
+    offsets_b: Dict[Tuple[str, str], List[int]] = {}
+    for offset_b, step in enumerate(steps_b[start : start + window]):
+        offsets_b.setdefault(memo.signature(step), []).append(offset_b)
+
+    best: Optional[Tuple[int, int]] = None
+    best_dist = 2 * window
+    for offset_a, step in enumerate(steps_a[start : start + window]):
+        if offset_a >= best_dist:
+            break  # Cannot beat (or tie with a smaller offset_a) the best
+        candidates = offsets_b.get(memo.signature(step))
+        if not candidates:
+            continue
+        # Offsets are ascending; (0, 0) is the mismatch being resolved
+        offset_b = candidates[0]
+        if offset_a == 0 and offset_b == 0:
+            if len(candidates) == 1:
                 continue
-            if _step_signature(steps_a[ia]) == _step_signature(steps_b[ib]):
-                return (ia, ib)
-    return None
+            offset_b = candidates[1]
+        if offset_a + offset_b < best_dist:
+            best = (start + offset_a, start + offset_b)
+            best_dist = offset_a + offset_b
+    return best
 
 
 # ---------------------------------------------------------------------------
@@ -301,18 +436,19 @@ def find_first_divergence(
     """
     steps_a = run_a.steps
     steps_b = run_b.steps
-    last_equal = -1
+    memo = _StepMemo()
 
-    i = 0
+    i = _digest_prefix_len(steps_a, steps_b)
+    last_equal = i - 1
     while i < len(steps_a) and i < len(steps_b):
-        dtype = _classify_step_divergence(steps_a[i], steps_b[i])
+        dtype = _classify_step_divergence(steps_a[i], steps_b[i], memo)
         if dtype == DivergenceType.EXACT_MATCH:
             last_equal = i
             i += 1
             continue
 
         # Mismatch — attempt resync within window
-        resync = _try_resync(steps_a, steps_b, i, window)
+        resync = _try_resync(steps_a, steps_b, i, window, memo)
         if resync is not None:
             ia, ib = resync
             gap_a = ia - i
@@ -331,13 +467,13 @@ def find_first_divergence(
                         i,
                         gap_a=gap_a,
                     ),
-                    old_step=_make_summary(steps_a[i]),
-                    new_step=_make_summary(steps_b[i]),
+                    old_step=memo.summary(steps_a[i]),
+                    new_step=memo.summary(steps_b[i]),
                     input_diff=None,
                     output_diff=None,
                     last_equal_idx=last_equal,
-                    context_a=_get_context(steps_a, i, context_size),
-                    context_b=_get_context(steps_b, i, context_size),
+                    context_a=_get_context(steps_a, i, context_size, memo),
+                    context_b=_get_context(steps_b, i, context_size, memo),
                 )
 
             if gap_b > 0 and gap_a == 0:
@@ -353,13 +489,13 @@ def find_first_divergence(
                         i,
                         gap_b=gap_b,
                     ),
-                    old_step=_make_summary(steps_a[i]),
-                    new_step=_make_summary(steps_b[i]),
+                    old_step=memo.summary(steps_a[i]),
+                    new_step=memo.summary(steps_b[i]),
                     input_diff=None,
                     output_diff=None,
                     last_equal_idx=last_equal,
-                    context_a=_get_context(steps_a, i, context_size),
-                    context_b=_get_context(steps_b, i, context_size),
+                    context_a=_get_context(steps_a, i, context_size, memo),
+                    context_b=_get_context(steps_b, i, context_size, memo),
                 )
             # Both gaps > 0: steps were replaced — fall through to classify
 
@@ -370,13 +506,13 @@ def find_first_divergence(
             idx_a=i,
             idx_b=i,
             explanation=_make_explanation(dtype, steps_a[i], steps_b[i], i, i),
-            old_step=_make_summary(steps_a[i]),
-            new_step=_make_summary(steps_b[i]),
+            old_step=memo.summary(steps_a[i]),
+            new_step=memo.summary(steps_b[i]),
             input_diff=input_diff,
             output_diff=output_diff,
             last_equal_idx=last_equal,
-            context_a=_get_context(steps_a, i, context_size),
-            context_b=_get_context(steps_b, i, context_size),
+            context_a=_get_context(steps_a, i, context_size, memo),
+            context_b=_get_context(steps_b, i, context_size, memo),
         )
 
     # One run is longer than the other
@@ -395,14 +531,16 @@ def find_first_divergence(
                 None,
                 gap_a=gap,
             ),
-            old_step=_make_summary(steps_a[idx]),
+            old_step=memo.summary(steps_a[idx]),
             new_step=None,
             input_diff=None,
             output_diff=None,
             last_equal_idx=last_equal,
-            context_a=_get_context(steps_a, idx, context_size),
+            context_a=_get_context(steps_a, idx, context_size, memo),
             context_b=(
-                _get_context(steps_b, len(steps_b) - 1, context_size) if steps_b else []
+                _get_context(steps_b, len(steps_b) - 1, context_size, memo)
+                if steps_b
+                else []
             ),
         )
 
@@ -422,14 +560,16 @@ def find_first_divergence(
                 gap_b=gap,
             ),
             old_step=None,
-            new_step=_make_summary(steps_b[idx]),
+            new_step=memo.summary(steps_b[idx]),
             input_diff=None,
             output_diff=None,
             last_equal_idx=last_equal,
             context_a=(
-                _get_context(steps_a, len(steps_a) - 1, context_size) if steps_a else []
+                _get_context(steps_a, len(steps_a) - 1, context_size, memo)
+                if steps_a
+                else []
             ),
-            context_b=_get_context(steps_b, idx, context_size),
+            context_b=_get_context(steps_b, idx, context_size, memo),
         )
 
     # Runs are identical
@@ -4,7 +4,7 @@ Produces a stable, ordered list of diff operations for JSON-like values.
 
 Ordering guarantees:
 - dict: removed keys (sorted), then added keys (sorted),
-then common keys (sorted, recursed)
+then common keys (sorted, recursed); mixed-type keys sort as strings
 - list: by index; removes at tail, then adds at tail
 - Type mismatch: replace whole node
 - int vs float treated as compatible numeric type
@@ -17,47 +17,122 @@ Output patch format:
 
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import AbstractSet, Any, Dict, List, Optional, Tuple, Union
+
+# A path is built lazily as a linked list of (parent, segment) nodes, with
+# None for the root. Dict keys are str segments and list indexes int
+# segments; the "$.a[0]" string is only formatted when an op is emitted.
+_Path = Optional[Tuple[Any, Union[str, int]]]
+
+# Marks a stack entry holding ops to emit once the entries above it are done
+_DEFERRED = object()
 
 
 def json_diff(old: Any, new: Any, path: str = "$") -> List[Dict[str, Any]]:
     """Produce a deterministic JSON diff patch between two values."""
     ops: List[Dict[str, Any]] = []
+    stack: List[Tuple[Any, Any, _Path]] = [(old, new, None)]
+
+    while stack:
+        old, new, node = stack.pop()
+
+        if old is _DEFERRED:
+            ops.extend(new)
+            continue
+
+        # Identical objects have no differences
+        if old is new:
+            continue
+
+        if type(old) is not type(new):
+            if isinstance(old, (int, float)) and isinstance(new, (int, float)):
+                if old != new:
+                    ops.append(_replace(path, node, old, new))
+                continue
+            ops.append(_replace(path, node, old, new))
+            continue
+
+        if isinstance(old, dict):
+            old_keys = old.keys()
+            new_keys = new.keys()
+            for k in _sorted_keys(old_keys - new_keys):
+                ops.append(
+                    {
+                        "op": "remove",
+                        "path": _format(path, (node, str(k))),
+                        "old": old[k],
+                    }
+                )
+            for k in _sorted_keys(new_keys - old_keys):
+                ops.append(
+                    {
+                        "op": "add",
+                        "path": _format(path, (node, str(k))),
+                        "value": new[k],
+                    }
+                )
+            # Pushed in reverse so that keys are visited in sorted order.
+            # Shared values (e.g. from one fixture) are never pushed at all.
+            for k in _sorted_keys(old_keys & new_keys, reverse=True):
+                old_value = old[k]
+                new_value = new[k]
+                if old_value is not new_value:
+                    stack.append((old_value, new_value, (node, str(k))))
+            continue
+
+        if isinstance(old, list):
+            min_len = min(len(old), len(new))
+            tail: List[Dict[str, Any]] = []
+            if len(old) > len(new):
+                for i in range(len(new), len(old)):
+                    tail.append(
+                        {
+                            "op": "remove",
+                            "path": _format(path, (node, i)),
+                            "old": old[i],
+                        }
+                    )
+            elif len(new) > len(old):
+                for i in range(len(old), len(new)):
+                    tail.append(
+                        {"op": "add", "path": _format(path, (node, i)), "value": new[i]}
+                    )
+            # Tail ops follow the diffs of every common element
+            if tail:
+                stack.append((_DEFERRED, tail, None))
+            for i in range(min_len - 1, -1, -1):
+                old_value = old[i]
+                new_value = new[i]
+                if old_value is not new_value:
+                    stack.append((old_value, new_value, (node, i)))
+            continue
+
+        if old != new:
+            ops.append(_replace(path, node, old, new))
 
-    if old is None and new is None:
-        return ops
-
-    if type(old) is not type(new):
-        if isinstance(old, (int, float)) and isinstance(new, (int, float)):
-            if old != new:
-                ops.append({"op": "replace", "path": path, "old": old, "new": new})
-            return ops
-        ops.append({"op": "replace", "path": path, "old": old, "new": new})
-        return ops
-
-    if isinstance(old, dict):
-        old_keys = set(old.keys())
-        new_keys = set(new.keys())
-        for k in sorted(old_keys - new_keys):
-            ops.append({"op": "remove", "path": f"{path}.{k}", "old": old[k]})
-        for k in sorted(new_keys - old_keys):
-            ops.append({"op": "add", "path": f"{path}.{k}", "value": new[k]})
-        for k in sorted(old_keys & new_keys):
-            ops.extend(json_diff(old[k], new[k], f"{path}.{k}"))
-        return ops
-
-    if isinstance(old, list):
-        min_len = min(len(old), len(new))
-        for i in range(min_len):
-            ops.extend(json_diff(old[i], new[i], f"{path}[{i}]"))
-        if len(old) > len(new):
-            for i in range(len(new), len(old)):
-                ops.append({"op": "remove", "path": f"{path}[{i}]", "old": old[i]})
-        elif len(new) > len(old):
-            for i in range(len(old), len(new)):
-                ops.append({"op": "add", "path": f"{path}[{i}]", "value": new[i]})
-        return ops
-
-    if old != new:
-        ops.append({"op": "replace", "path": path, "old": old, "new": new})
     return ops
+
+
+def _sorted_keys(keys: AbstractSet[Any], reverse: bool = False) -> List[Any]:
+    # Payload keys are nearly always all str, which sort natively without a
+    # key function; only mixed key types fall back to comparing as strings
+    try:
+        return sorted(keys, reverse=reverse)
+    except TypeError:
+        return sorted(keys, key=str, reverse=reverse)
+
+
+def _replace(root: str, node: _Path, old: Any, new: Any) -> Dict[str, Any]:
+    return {"op": "replace", "path": _format(root, node), "old": old, "new": new}
+
+
+def _format(root: str, node: _Path) -> str:
+    segments: List[str] = []
+    while node is not None:
+        node, segment = node
+        if type(segment) is int:
+            segments.append(f"[{segment}]")
+        else:
+            segments.append(f".{segment}")
+    segments.append(root)
+    return "".join(reversed(segments))
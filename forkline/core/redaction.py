@@ -16,9 +16,18 @@ from __future__ import annotations
 
 import copy
 import hashlib
+import re
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+# Bound on RedactionPolicy._hash_cache; the cache is emptied when full
+_HASH_CACHE_SIZE = 4096
+
+
+def _shallow_copy(container: Any) -> Any:
+    """Return a new plain dict or list with the same items as container."""
+    return dict(container) if isinstance(container, dict) else list(container)
 
 
 class RedactionAction(str, Enum):
@@ -29,7 +38,7 @@ class RedactionAction(str, Enum):
     DROP = "drop"  # Remove the field entirely
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class RedactionRule:
     """
     A single redaction rule.
@@ -62,14 +71,58 @@ class RedactionPolicy:
     No I/O. No randomness. No mutation of inputs.
     """
 
-    def __init__(self, rules: List[RedactionRule]):
+    def __init__(self, rules: Sequence[RedactionRule]):
         """
         Create a redaction policy.
 
         Args:
-            rules: Ordered list of redaction rules (first match wins)
+            rules: Ordered redaction rules (first match wins). They are
+                copied into a tuple and compiled here; build a new policy
+                to change them.
         """
-        self.rules = rules
+        self._rules: Tuple[RedactionRule, ...] = tuple(rules)
+
+        # repr of a HASH-redacted value -> its "hash:..." replacement
+        self._hash_cache: Dict[str, str] = {}
+
+        # Patterns are lowercased once here instead of on every key lookup
+        self._matchers: Tuple[Tuple[RedactionRule, Optional[str], Optional[str]], ...]
+        self._matchers = tuple(
+            (
+                rule,
+                rule.key_pattern.lower() if rule.key_pattern is not None else None,
+                rule.path_pattern.lower() if rule.path_pattern is not None else None,
+            )
+            for rule in self._rules
+        )
+
+        # Paths are only built and lowercased when some rule looks at them
+        self._uses_paths = any(path is not None for _, _, path in self._matchers)
+
+        # When every rule has a key_pattern, a key containing none of them
+        # cannot match any rule. One combined search rejects such keys
+        # without walking the rule list.
+        self._key_screen: Optional[re.Pattern[str]] = None
+        if self._rules and all(key is not None for _, key, _ in self._matchers):
+            self._key_screen = re.compile(
+                "|".join(re.escape(key) for _, key, _ in self._matchers)
+            )
+
+    @property
+    def rules(self) -> Tuple[RedactionRule, ...]:
+        """Ordered redaction rules. Read-only: the matchers are built from them."""
+        return self._rules
+
+    def _copy(self) -> RedactionPolicy:
+        """A policy sharing this one's compiled rules, with an empty hash cache."""
+        policy = copy.copy(self)
+        policy._hash_cache = {}
+        return policy
+
+    @property
+    def is_noop(self) -> bool:
+        """True if the policy has no rules and never changes a payload."""
+        return not self._matchers
 
     def redact(self, event_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -80,81 +133,121 @@ class RedactionPolicy:
             payload: Event payload to redact
 
         Returns:
-            Redacted payload (new dict, input not mutated)
+            Redacted payload (input not mutated). Only containers on the
+            way to a redacted key are copied; untouched subtrees, and the
+            payload itself when nothing matches, are shared with the
+            input, so treat the result as read-only.
+
+        Raises:
+            ValueError: If the payload contains itself. Redaction runs
+                before serialization, so this is where a cycle surfaces.
         """
-        # Deep copy to ensure no mutation of input
-        redacted = copy.deepcopy(payload)
-
-        # Apply redaction recursively
-        return self._redact_value(redacted, path="")
+        return self._redact_value(payload, path="")
 
     def _redact_value(self, value: Any, path: str) -> Any:
         """
-        Recursively redact a value.
+        Redact a value and everything nested inside it, copy-on-write.
+
+        A first pass walks every dict and list with an explicit stack
+        rather than recursion, so deeply nested payloads are not bounded by
+        the interpreter's recursion limit, and records the keys that match
+        a rule. A second pass, children before parents, shallow-copies only
+        the containers holding a match or a copied child.
 
         Args:
             value: Value to redact (dict, list, or primitive)
-            path: Current dot-separated path (for path_pattern matching)
+            path: Dot-separated path of value (for path_pattern matching)
 
         Returns:
             Redacted value
-        """
-        if isinstance(value, dict):
-            return self._redact_dict(value, path)
-        elif isinstance(value, list):
-            return self._redact_list(value, path)
-        else:
-            # Primitives: check if current path should be redacted
-            # (relevant when called from _redact_dict with a specific key)
-            return value
-
-    def _redact_dict(self, d: Dict[str, Any], path: str) -> Dict[str, Any]:
-        """
-        Redact a dictionary by applying rules to each key-value pair.
-
-        Args:
-            d: Dictionary to redact
-            path: Current dot-separated path
 
-        Returns:
-            Redacted dictionary
-        """
-        result = {}
-
-        for key, value in d.items():
-            # Build full path for this key
-            current_path = f"{path}.{key}" if path else key
-
-            # Check if this key should be redacted
-            matched_rule = self._find_matching_rule(key, current_path)
-
-            if matched_rule is None:
-                # No match: recursively redact the value
-                result[key] = self._redact_value(value, current_path)
-            elif matched_rule.action == RedactionAction.DROP:
-                # Drop: omit the key entirely
-                pass
-            elif matched_rule.action == RedactionAction.MASK:
-                # Mask: replace with sentinel
-                result[key] = "[REDACTED]"
-            elif matched_rule.action == RedactionAction.HASH:
-                # Hash: deterministic SHA-256
-                result[key] = self._hash_value(value)
-
-        return result
-
-    def _redact_list(self, lst: List[Any], path: str) -> List[Any]:
+        Raises:
+            ValueError: If a container holds itself, directly or nested
         """
-        Redact a list by recursively redacting each element.
+        if not isinstance(value, (dict, list)):
+            return value
 
-        Args:
-            lst: List to redact
-            path: Current dot-separated path
+        # (container, its path, index of its parent frame, slot in parent).
+        # Frames are numbered in pre-order, so a parent precedes its children.
+        frames: List[Tuple[Any, str, int, Any]] = []
+        # Frame index -> keys of that dict matched by a rule, in order
+        hits: Dict[int, List[Tuple[str, RedactionRule]]] = {}
+        # ids of the containers on the current ancestor chain. A subtree
+        # shared by two parents is walked twice; one that contains itself
+        # would be walked forever.
+        on_path: Set[int] = set()
+
+        # Pending frames to enter, and frame indices to leave once all of
+        # their children have been walked
+        stack: List[Any] = [(value, path, -1, None)]
+
+        uses_paths = self._uses_paths
+        while stack:
+            entry = stack.pop()
+            if type(entry) is int:
+                on_path.discard(id(frames[entry][0]))
+                continue
+
+            node, node_path = entry[0], entry[1]
+            if id(node) in on_path:
+                raise ValueError("Circular reference detected in payload")
+            on_path.add(id(node))
+            i = len(frames)
+            frames.append(entry)
+            stack.append(i)
+
+            if isinstance(node, dict):
+                for key, child in node.items():
+                    # Build full path for this key
+                    if uses_paths:
+                        current_path = f"{node_path}.{key}" if node_path else key
+                    else:
+                        current_path = ""
+
+                    # Check if this key should be redacted
+                    matched_rule = self._find_matching_rule(key, current_path)
+
+                    if matched_rule is not None:
+                        hits.setdefault(i, []).append((key, matched_rule))
+                    elif isinstance(child, (dict, list)):
+                        stack.append((child, current_path, i, key))
+            else:
+                # List elements share the list's path
+                for j, item in enumerate(node):
+                    if isinstance(item, (dict, list)):
+                        stack.append((item, node_path, i, j))
+
+        if not hits:
+            return value
 
-        Returns:
-            Redacted list
-        """
-        return [self._redact_value(item, path) for item in lst]
+        copies: Dict[int, Any] = {}
+        for i in range(len(frames) - 1, -1, -1):
+            matched = hits.get(i)
+            result = copies.get(i)
+            if matched is None and result is None:
+                continue  # Nothing below this container changed
+
+            node, _, parent, slot = frames[i]
+            if result is None:
+                result = copies[i] = _shallow_copy(node)
+            for key, rule in matched or ():
+                if rule.action == RedactionAction.DROP:
+                    # Drop: omit the key entirely
+                    del result[key]
+                elif rule.action == RedactionAction.MASK:
+                    # Mask: replace with sentinel
+                    result[key] = "[REDACTED]"
+                elif rule.action == RedactionAction.HASH:
+                    # Hash: deterministic SHA-256
+                    result[key] = self._hash_value(node[key])
+
+            if parent >= 0:
+                parent_copy = copies.get(parent)
+                if parent_copy is None:
+                    parent_copy = copies[parent] = _shallow_copy(frames[parent][0])
+                parent_copy[slot] = result
+
+        return copies[0]
 
     def _find_matching_rule(self, key: str, path: str) -> Optional[RedactionRule]:
         """
@@ -167,16 +260,20 @@ class RedactionPolicy:
         Returns:
             First matching rule, or None if no match
         """
-        for rule in self.rules:
+        if not self._matchers:
+            return None
+
+        key_lower = key.lower()
+        if self._key_screen is not None and self._key_screen.search(key_lower) is None:
+            return None
+
+        path_lower = path.lower() if self._uses_paths else ""
+        for rule, key_pattern, path_pattern in self._matchers:
             # Check key_pattern (case-insensitive substring match)
-            key_matches = (
-                rule.key_pattern is None or rule.key_pattern.lower() in key.lower()
-            )
+            key_matches = key_pattern is None or key_pattern in key_lower
 
             # Check path_pattern (case-insensitive substring match)
-            path_matches = (
-                rule.path_pattern is None or rule.path_pattern.lower() in path.lower()
-            )
+            path_matches = path_pattern is None or path_pattern in path_lower
 
             # Both must match (if specified)
             if key_matches and path_matches:
@@ -196,27 +293,47 @@ class RedactionPolicy:
         """
         # Serialize value to stable string representation
         # Use repr for determinism (same value → same repr)
-        serialized = repr(value).encode("utf-8")
+        serialized = repr(value)
+
+        # Secrets recur across events, so each distinct repr is hashed once
+        hashed = self._hash_cache.get(serialized)
+        if hashed is None:
+            # Compute SHA-256
+            digest = hashlib.sha256(serialized.encode("utf-8")).hexdigest()
 
-        # Compute SHA-256
-        digest = hashlib.sha256(serialized).hexdigest()
+            # Prefix for clarity
+            hashed = f"hash:{digest}"
 
-        # Prefix for clarity
-        return f"hash:{digest}"
+            if len(self._hash_cache) >= _HASH_CACHE_SIZE:
+                self._hash_cache.clear()
+            self._hash_cache[serialized] = hashed
+        return hashed
+
+
+# Built on first use by create_default_policy(); callers get copies of it
+_DEFAULT_POLICY: Optional[RedactionPolicy] = None
 
 
 def create_default_policy() -> RedactionPolicy:
     """
-    Create the default SAFE mode redaction policy.
+    Return the default SAFE mode redaction policy.
 
     This policy implements the SAFE mode behavior described in REDACTION_POLICY.md:
     - Masks secrets (env keys, headers, tokens)
     - Masks sensitive tool arguments
     - Prevents credential leakage
 
+    Each call returns a new policy with its own hash cache. The rules and
+    their compiled matchers are immutable, so they are built once and
+    shared between the copies.
+
     Returns:
         Default RedactionPolicy for production use
     """
+    global _DEFAULT_POLICY
+    if _DEFAULT_POLICY is not None:
+        return _DEFAULT_POLICY._copy()
+
     rules = [
         # Environment variables containing secrets
         RedactionRule(action=RedactionAction.MASK, key_pattern="key"),
@@ -241,4 +358,5 @@ def create_default_policy() -> RedactionPolicy:
         RedactionRule(action=RedactionAction.MASK, key_pattern="csrf"),
     ]
 
-    return RedactionPolicy(rules)
+    _DEFAULT_POLICY = RedactionPolicy(rules)
+    return _DEFAULT_POLICY._copy()
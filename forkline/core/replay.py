@@ -25,10 +25,13 @@ import uuid
 from contextlib import contextmanager
 from dataclasses import dataclass, field
 from enum import Enum
+from itertools import islice
 from typing import (
+    AbstractSet,
     Any,
     Callable,
     Dict,
+    FrozenSet,
     Generator,
     Iterator,
     List,
@@ -259,7 +262,7 @@ class DivergenceReason(Enum):
     MISSING_STEPS = "missing_steps"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ReplayPolicy:
     """
     Configuration for replay behavior.
@@ -333,7 +336,7 @@ class ReplayStatus(Enum):
     REPLAY_NOT_FOUND = "replay_not_found"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FieldDiff:
     """
     Represents a difference in a specific field.
@@ -351,8 +354,12 @@ class FieldDiff:
         act = _truncate(self.actual)
         return f"{self.path}: expected {exp}, got {act}"
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dict for serialization."""
+        return {"path": self.path, "expected": self.expected, "actual": self.actual}
+
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Divergence:
     """
     Captures the exact point where two runs diverge.
@@ -400,14 +407,11 @@ class Divergence:
             "reason": self.reason.value,
             "expected": self.expected,
             "actual": self.actual,
-            "diff": [
-                {"path": d.path, "expected": d.expected, "actual": d.actual}
-                for d in self.diff
-            ],
+            "diff": [d.to_dict() for d in self.diff],
         }
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DivergencePoint:
     """
     Captures the exact point where two runs diverge.
@@ -474,7 +478,7 @@ class DivergencePoint:
         )
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ReplayStepResult:
     """
     Result of comparing a single step.
@@ -489,7 +493,7 @@ class ReplayStepResult:
     divergence: Optional[DivergencePoint] = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ReplayResult:
     """
     Complete result of a replay operation.
@@ -567,23 +571,60 @@ class ReplayResult:
 
 def _truncate(value: Any, max_len: int = 50) -> str:
     """Truncate a value for display."""
-    s = repr(value)
+    # Every item adds at least one character to a container's repr, so the
+    # first max_len items already give the displayed prefix; repr() of the
+    # rest of a large payload would only be thrown away
+    value_type = type(value)
+    if (value_type is list or value_type is tuple) and len(value) > max_len:
+        s = repr(value[:max_len])
+    elif value_type is dict and len(value) > max_len:
+        s = repr(dict(islice(value.items(), max_len)))
+    else:
+        s = repr(value)
     if len(s) > max_len:
         return s[: max_len - 3] + "..."
     return s
 
 
+# Payload fields compare_events skips when ignoring timestamps
+_TIMESTAMP_FIELDS: FrozenSet[str] = frozenset({"created_at", "ts", "timestamp"})
+_NO_IGNORED_FIELDS: FrozenSet[str] = frozenset()
+
+# Leaf types whose values deep_compare can settle with a single ==
+_PRIMITIVE_TYPES = frozenset({str, int, float, bool, type(None), bytes})
+
+
+# A deep_compare path as a linked list of (parent, segment) nodes, with
+# None for the root: dict keys are str segments, list indexes int ones
+_PathNode = Optional[Tuple[Any, Any]]
+
+
+def _format_path(root: str, node: _PathNode) -> str:
+    """Render a path node as "root.key[0].field"."""
+    segments: List[Any] = []
+    while node is not None:
+        node, segment = node
+        segments.append(segment)
+    path = root
+    for segment in reversed(segments):
+        if type(segment) is int:
+            path = f"{path}[{segment}]"
+        else:
+            path = f"{path}.{segment}" if path else segment
+    return path
+
+
 def deep_compare(
     expected: Any,
     actual: Any,
     path: str = "",
-    ignore_fields: Optional[set] = None,
+    ignore_fields: Optional[AbstractSet[str]] = None,
 ) -> List[FieldDiff]:
     """
     Deep semantic comparison of two values.
 
     Returns a list of FieldDiff for each difference found.
-    Compares recursively through dicts and lists.
+    Compares nested dicts and lists at any depth.
 
     Args:
         expected: The expected (recorded) value
@@ -594,68 +635,126 @@ def deep_compare(
     Returns:
         List of FieldDiff objects, empty if values match
     """
-    ignore_fields = ignore_fields or set()
+    if ignore_fields is None:
+        ignore_fields = _NO_IGNORED_FIELDS
+    root = path
     diffs: List[FieldDiff] = []
 
-    # Type mismatch is an immediate difference
-    if type(expected) is not type(actual):
-        diffs.append(
-            FieldDiff(
-                path=path or "(root)",
-                expected=f"type:{type(expected).__name__}",
-                actual=f"type:{type(actual).__name__}",
+    # Walked with an explicit stack so deep payloads do not hit the
+    # recursion limit. Entries are (expected, actual, node) to compare or a
+    # FieldDiff to emit, pushed in reverse so diffs come out in path order.
+    # Paths are _PathNode links, formatted only when a diff is emitted.
+    stack: List[Any] = [(expected, actual, None)]
+    while stack:
+        item = stack.pop()
+        if type(item) is FieldDiff:
+            diffs.append(item)
+            continue
+        expected, actual, node = item
+
+        # The same object on both sides (e.g. a run validated against
+        # itself, or a shared sub-dict) has nothing to report
+        if expected is actual:
+            continue
+
+        # Type mismatch is an immediate difference
+        if type(expected) is not type(actual):
+            diffs.append(
+                FieldDiff(
+                    path=_format_path(root, node) or "(root)",
+                    expected=f"type:{type(expected).__name__}",
+                    actual=f"type:{type(actual).__name__}",
+                )
             )
-        )
-        return diffs
-
-    # Dict comparison
-    if isinstance(expected, dict):
-        all_keys = set(expected.keys()) | set(actual.keys())
-        for key in sorted(all_keys):
-            if key in ignore_fields:
+            continue
+
+        # Dict comparison
+        if isinstance(expected, dict):
+            # Sorting keeps the diff order deterministic; keys are pushed
+            # last first so they pop in sorted order
+            keys = expected.keys()
+            if keys == actual.keys():
+                # Payloads usually share their key set, so neither side
+                # can be missing a key and no union is needed
+                for key in reversed(sorted(keys)):
+                    if key in ignore_fields:
+                        continue
+                    exp_value = expected[key]
+                    act_value = actual[key]
+                    if exp_value is act_value or (
+                        type(exp_value) in _PRIMITIVE_TYPES
+                        and type(act_value) is type(exp_value)
+                        and exp_value == act_value
+                    ):
+                        continue
+                    stack.append(
+                        (
+                            exp_value,
+                            act_value,
+                            (node, key if type(key) is str else f"{key}"),
+                        )
+                    )
                 continue
-            child_path = f"{path}.{key}" if path else key
-            if key not in expected:
-                diffs.append(
-                    FieldDiff(path=child_path, expected="<missing>", actual=actual[key])
-                )
-            elif key not in actual:
+
+            pending: List[Any] = []
+            for key in sorted(keys | actual.keys()):
+                if key in ignore_fields:
+                    continue
+                child = (node, key if type(key) is str else f"{key}")
+                if key not in expected:
+                    pending.append(
+                        FieldDiff(
+                            path=_format_path(root, child),
+                            expected="<missing>",
+                            actual=actual[key],
+                        )
+                    )
+                elif key not in actual:
+                    pending.append(
+                        FieldDiff(
+                            path=_format_path(root, child),
+                            expected=expected[key],
+                            actual="<missing>",
+                        )
+                    )
+                else:
+                    pending.append((expected[key], actual[key], child))
+            stack.extend(reversed(pending))
+            continue
+
+        # List comparison
+        if isinstance(expected, list):
+            if len(expected) != len(actual):
+                path = _format_path(root, node)
                 diffs.append(
                     FieldDiff(
-                        path=child_path, expected=expected[key], actual="<missing>"
+                        path=f"{path}.(length)" if path else "(length)",
+                        expected=len(expected),
+                        actual=len(actual),
                     )
                 )
-            else:
-                diffs.extend(
-                    deep_compare(expected[key], actual[key], child_path, ignore_fields)
-                )
-        return diffs
-
-    # List comparison
-    if isinstance(expected, list):
-        if len(expected) != len(actual):
+                # Still compare common elements
+            for i in range(min(len(expected), len(actual)) - 1, -1, -1):
+                exp_value = expected[i]
+                act_value = actual[i]
+                if exp_value is act_value or (
+                    type(exp_value) in _PRIMITIVE_TYPES
+                    and type(act_value) is type(exp_value)
+                    and exp_value == act_value
+                ):
+                    continue
+                stack.append((exp_value, act_value, (node, i)))
+            continue
+
+        # Primitive comparison
+        if expected != actual:
             diffs.append(
                 FieldDiff(
-                    path=f"{path}.(length)" if path else "(length)",
-                    expected=len(expected),
-                    actual=len(actual),
+                    path=_format_path(root, node) or "(root)",
+                    expected=expected,
+                    actual=actual,
                 )
             )
-            # Still compare common elements
-        for i, (exp_item, act_item) in enumerate(zip(expected, actual)):
-            child_path = f"{path}[{i}]"
-            diffs.extend(deep_compare(exp_item, act_item, child_path, ignore_fields))
-        return diffs
-
-    # Primitive comparison
-    if expected != actual:
-        diffs.append(
-            FieldDiff(
-                path=path or "(root)",
-                expected=expected,
-                actual=actual,
-            )
-        )
 
     return diffs
 
@@ -685,7 +784,7 @@ def compare_events(
         diffs.append(FieldDiff(path="type", expected=expected.type, actual=actual.type))
 
     # Compare payload semantically
-    ignore_fields = {"created_at", "ts", "timestamp"} if ignore_timestamps else set()
+    ignore_fields = _TIMESTAMP_FIELDS if ignore_timestamps else _NO_IGNORED_FIELDS
     payload_diffs = deep_compare(
         expected.payload, actual.payload, "payload", ignore_fields
     )
@@ -705,6 +804,14 @@ def compare_steps(
     Returns (matched, divergence_point). If matched is True, divergence_point is None.
     Halts at first divergence per the core invariant.
 
+    Steps whose stored events_hash values are equal match without comparing
+    their events. The digest covers the exact stored text, so payloads
+    holding NaN match an identically stored copy, although NaN != NaN.
+    (deep_compare() agrees for loaded runs: json.loads() returns one shared
+    NaN object, and a value is equal to itself. Separately built NaN values
+    differ.) events_hash is only authoritative for steps loaded unmodified
+    from storage; see Step.
+
     Args:
         expected: The expected (original) step
         actual: The actual (replayed) step
@@ -725,8 +832,14 @@ def compare_steps(
             ],
         )
 
+    # Identical stored events: nothing left to compare
+    if expected.events_hash is not None and expected.events_hash == actual.events_hash:
+        return True, None
+
     # Compare event count
-    if len(expected.events) != len(actual.events):
+    expected_count = len(expected.events)
+    actual_count = len(actual.events)
+    if expected_count != actual_count:
         return False, DivergencePoint(
             step_idx=expected.idx,
             step_name=expected.name,
@@ -735,8 +848,8 @@ def compare_steps(
             field_diffs=[
                 FieldDiff(
                     path="events.(length)",
-                    expected=len(expected.events),
-                    actual=len(actual.events),
+                    expected=expected_count,
+                    actual=actual_count,
                 )
             ],
             context={
@@ -814,17 +927,47 @@ class ReplayEngine:
         """
         return self.store.load_run(run_id)
 
+    def load_run_lazy(self, run_id: str) -> Optional[Run]:
+        """
+        Load a run whose steps read their events on first access.
+
+        A thin wrapper around store.load_run_lazy. Falls back to
+        load_run() when the store has no load_run_lazy, or when a subclass
+        overrides load_run() but not this method, so the override is
+        still used.
+
+        The store must stay open while the run is used. Each step's events
+        are read in their own transaction when the step is first accessed,
+        so a lazy run is not a consistent snapshot of a run that is still
+        being written.
+
+        Args:
+            run_id: The run identifier
+
+        Returns:
+            Run object if found, None otherwise
+        """
+        store_load_run_lazy = getattr(self.store, "load_run_lazy", None)
+        if (
+            store_load_run_lazy is None
+            or type(self).load_run is not ReplayEngine.load_run
+        ):
+            return self.load_run(run_id)
+        return store_load_run_lazy(run_id)
+
     def compare_runs(
         self,
         original_run_id: str,
         replay_run_id: str,
         ignore_timestamps: bool = True,
+        lazy: bool = True,
     ) -> ReplayResult:
         """
         Compare two runs and find the first point of divergence.
 
         This is the core replay operation. It:
-        1. Loads both runs from storage
+        1. Loads both runs from storage (lazily by default, reading each
+           step's events only when the comparison reaches that step)
         2. Compares steps in strict original order
         3. Halts at first divergence (per core invariant)
         4. Returns structured result with exact divergence location
@@ -833,12 +976,20 @@ class ReplayEngine:
             original_run_id: ID of the original (expected) run
             replay_run_id: ID of the replay (actual) run
             ignore_timestamps: If True, ignore timestamp metadata in comparisons
+            lazy: If True, load runs with load_run_lazy(), otherwise with
+                load_run(). Lazy runs need the store to stay open during
+                the comparison, and each step's events are read in their
+                own transaction, so they are not a consistent snapshot of
+                runs that are still being written.
 
         Returns:
             ReplayResult with status, divergence info, and step-by-step results
         """
-        # Load runs
-        original_run = self.load_run(original_run_id)
+        # Load runs lazily: comparison halts at the first divergence, so
+        # steps after it are never read
+        load_run = self.load_run_lazy if lazy else self.load_run
+
+        original_run = load_run(original_run_id)
         if original_run is None:
             return ReplayResult(
                 original_run_id=original_run_id,
@@ -848,7 +999,7 @@ class ReplayEngine:
                 total_events_compared=0,
             )
 
-        replay_run = self.load_run(replay_run_id)
+        replay_run = load_run(replay_run_id)
         if replay_run is None:
             return ReplayResult(
                 original_run_id=original_run_id,
@@ -935,7 +1086,13 @@ class ReplayEngine:
             matched, divergence = compare_steps(
                 orig_step, replay_step, ignore_timestamps
             )
-            events_in_step = min(len(orig_step.events), len(replay_step.events))
+            orig_event_count = len(orig_step.events)
+            replay_event_count = len(replay_step.events)
+            events_in_step = (
+                orig_event_count
+                if orig_event_count < replay_event_count
+                else replay_event_count
+            )
 
             step_result = ReplayStepResult(
                 step_idx=step_idx,
@@ -947,7 +1104,7 @@ class ReplayEngine:
             step_results.append(step_result)
 
             if matched:
-                total_events_compared += len(orig_step.events)
+                total_events_compared += orig_event_count
             else:
                 # First divergence - halt immediately
                 # Count events up to divergence point
@@ -997,7 +1154,18 @@ class ReplayEngine:
         Returns:
             ReplayResult (should always be MATCH for a valid run)
         """
-        return self.compare_runs(run_id, run_id)
+        # Load once and compare the run with itself; shared steps and
+        # payloads take the identity fast paths in the comparison
+        run = self.load_run(run_id)
+        if run is None:
+            return ReplayResult(
+                original_run_id=run_id,
+                replay_run_id=run_id,
+                status=ReplayStatus.ORIGINAL_NOT_FOUND,
+                steps_compared=0,
+                total_events_compared=0,
+            )
+        return self._compare_loaded_runs(run, run, ignore_timestamps=True)
 
     def replay(
         self,
@@ -1098,37 +1266,40 @@ class ReplayEngine:
                     artifact_type="events",
                 )
 
-            # Validate tool/LLM outputs exist if comparison is enabled
-            if policy.compare_tool_outputs:
-                tool_events = [e for e in step.events if e.type == "tool_call"]
-                for event_idx, event in enumerate(tool_events):
-                    if (
-                        "result" not in event.payload
-                        and policy.fail_on_missing_artifact
-                    ):
-                        name = event.payload.get("name", "unknown")
-                        raise MissingArtifactError(
-                            f"Tool call missing result: {name}",
-                            run_id=run.run_id,
-                            step_idx=step_idx,
-                            event_idx=event_idx,
-                            artifact_type="tool_result",
-                        )
+            # Validate tool/LLM outputs exist if comparison is enabled.
+            # One pass sorts the step's events into the lists to check.
+            tool_events: List[Event] = []
+            llm_events: List[Event] = []
+            if policy.fail_on_missing_artifact:
+                for e in step.events:
+                    if e.type == "tool_call":
+                        if policy.compare_tool_outputs:
+                            tool_events.append(e)
+                    elif e.type in ("llm_call", "output"):
+                        if policy.compare_llm_outputs:
+                            llm_events.append(e)
+
+            for event_idx, event in enumerate(tool_events):
+                if "result" not in event.payload:
+                    name = event.payload.get("name", "unknown")
+                    raise MissingArtifactError(
+                        f"Tool call missing result: {name}",
+                        run_id=run.run_id,
+                        step_idx=step_idx,
+                        event_idx=event_idx,
+                        artifact_type="tool_result",
+                    )
 
-            if policy.compare_llm_outputs:
-                llm_events = [
-                    e for e in step.events if e.type in ("llm_call", "output")
-                ]
-                for event_idx, event in enumerate(llm_events):
-                    # LLM events should have some response content
-                    if not event.payload and policy.fail_on_missing_artifact:
-                        raise MissingArtifactError(
-                            "LLM call missing output",
-                            run_id=run.run_id,
-                            step_idx=step_idx,
-                            event_idx=event_idx,
-                            artifact_type="llm_output",
-                        )
+            for event_idx, event in enumerate(llm_events):
+                # LLM events should have some response content
+                if not event.payload:
+                    raise MissingArtifactError(
+                        "LLM call missing output",
+                        run_id=run.run_id,
+                        step_idx=step_idx,
+                        event_idx=event_idx,
+                        artifact_type="llm_output",
+                    )
 
             step_results.append(
                 ReplayStepResult(
@@ -1191,7 +1362,13 @@ class ReplayEngine:
                 ignore_timestamps=policy.ignore_timestamps,
             )
 
-            events_in_step = min(len(recorded_step.events), len(replayed_step.events))
+            recorded_event_count = len(recorded_step.events)
+            replayed_event_count = len(replayed_step.events)
+            events_in_step = (
+                recorded_event_count
+                if recorded_event_count < replayed_event_count
+                else replayed_event_count
+            )
 
             step_result = ReplayStepResult(
                 step_idx=step_idx,
@@ -1203,7 +1380,7 @@ class ReplayEngine:
             step_results.append(step_result)
 
             if matched:
-                total_events_compared += len(recorded_step.events)
+                total_events_compared += recorded_event_count
             else:
                 # First divergence - halt immediately (core invariant)
                 if divergence and divergence.event_idx is not None:
@@ -1263,7 +1440,12 @@ class ReplayContext:
         """
         self.run = run
         self._step_cursor = 0
-        self._event_cursors: Dict[int, int] = {}  # step_idx -> event cursor
+        # Event cursor per step, indexed by step_idx
+        self._event_cursors: List[int] = [0] * len(run.steps)
+        # First step index for each step name
+        self._name_index: Dict[str, int] = {}
+        for idx, step in enumerate(run.steps):
+            self._name_index.setdefault(step.name, idx)
 
     @classmethod
     def from_run(cls, run: Run) -> "ReplayContext":
@@ -1308,10 +1490,10 @@ class ReplayContext:
         Returns:
             Step if found, None otherwise
         """
-        for step in self.run.steps:
-            if step.name == name:
-                return step
-        return None
+        idx = self._name_index.get(name)
+        if idx is None:
+            return None
+        return self.run.steps[idx]
 
     def get_event(self, step_idx: int, event_idx: int) -> Optional[Event]:
         """
@@ -1383,7 +1565,7 @@ class ReplayContext:
         if step is None:
             return None
 
-        cursor = self._event_cursors.get(step_idx, 0)
+        cursor = self._event_cursors[step_idx]
         if cursor >= len(step.events):
             return None
 
@@ -1412,7 +1594,7 @@ class ReplayContext:
         if step is None:
             return None
 
-        cursor = self._event_cursors.get(step_idx, 0)
+        cursor = self._event_cursors[step_idx]
         if cursor >= len(step.events):
             return None
 
@@ -1427,9 +1609,10 @@ class ReplayContext:
                      If None, reset all cursors.
         """
         if step_idx is not None:
-            self._event_cursors[step_idx] = 0
+            if 0 <= step_idx < len(self._event_cursors):
+                self._event_cursors[step_idx] = 0
         else:
-            self._event_cursors.clear()
+            self._event_cursors = [0] * len(self.run.steps)
             self._step_cursor = 0
 
 
@@ -4,7 +4,7 @@ from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Event:
     event_id: Optional[int]
     run_id: str
@@ -14,7 +14,7 @@ class Event:
     payload: Dict[str, Any] = field(default_factory=dict)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Step:
     step_id: Optional[int]
     run_id: str
@@ -23,9 +23,19 @@ class Step:
     started_at: str
     ended_at: Optional[str] = None
     events: List[Event] = field(default_factory=list)
-
-
-@dataclass(frozen=True)
+    # Digests filled in by storage when they were computed at record time.
+    # input/output_hash cover canonicalized input/output payloads;
+    # events_hash covers the exact stored type and payload of every event.
+    # Derived data, so not compared. Comparisons trust equal digests, so
+    # they are only valid for steps loaded unmodified from storage: a step
+    # rebuilt with other events, e.g. dataclasses.replace(step, events=...),
+    # must also reset them to None.
+    input_hash: Optional[str] = field(default=None, compare=False)
+    output_hash: Optional[str] = field(default=None, compare=False)
+    events_hash: Optional[str] = field(default=None, compare=False)
+
+
+@dataclass(frozen=True, slots=True)
 class Run:
     """
     Represents a recorded run.
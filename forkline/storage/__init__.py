@@ -1,9 +1,47 @@
-"""Storage implementations for Forkline."""
+"""Storage implementations for Forkline.
 
-from .recorder import RunRecorder
-from .store import SQLiteStore
+Backends are imported on first access (PEP 562), so using one does not
+load the others.
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .log_store import LogStore
+    from .recorder import RunRecorder
+    from .store import SQLiteStore
+
+# Public name -> submodule defining it
+_LAZY_IMPORTS = {
+    "LogStore": "log_store",
+    "RunRecorder": "recorder",
+    "SQLiteStore": "store",
+}
+
+# Submodules reachable as attributes, as with eager imports
+_SUBMODULES = frozenset({"clock", "codec", "log_store", "recorder", "store"})
 
 __all__ = [
+    "LogStore",
     "RunRecorder",
     "SQLiteStore",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_IMPORTS.get(name)
+    if module is not None:
+        value = getattr(importlib.import_module("." + module, __name__), name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module("." + name, __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__) | _SUBMODULES)
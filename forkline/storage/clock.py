@@ -0,0 +1,31 @@
+"""
+UTC timestamps for recorded runs, steps and events.
+
+Every recorded event carries a timestamp, so formatting one is on the
+recording hot path. utc_now_iso() returns the same text as
+datetime.now(timezone.utc).isoformat() but formats the date and time of
+day only once per second.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Tuple
+
+# (epoch second, "YYYY-MM-DDTHH:MM:SS") of the last timestamp. Replaced as
+# one tuple so concurrent callers never pair a second with another's text.
+_second_cache: Tuple[int, str] = (-1, "")
+
+
+def utc_now_iso() -> str:
+    """Current UTC time as ISO 8601 text, e.g. 2024-01-01T00:00:00.123456+00:00."""
+    global _second_cache
+    second, micros = divmod(time.time_ns() // 1000, 1_000_000)
+    cached_second, prefix = _second_cache
+    if second != cached_second:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        _second_cache = (second, prefix)
+    # isoformat() leaves out a zero microsecond field
+    if micros:
+        return f"{prefix}.{micros:06d}+00:00"
+    return f"{prefix}+00:00"
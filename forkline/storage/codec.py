@@ -0,0 +1,67 @@
+"""
+JSON encoding for persisted event payloads.
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise. A payload only takes the orjson path when its output decodes
+back to the payload itself, so stored payloads decode to the same values,
+and the same values are rejected, whichever encoder is installed. The
+stored text itself differs between the two (spacing, escaping, float
+formatting), and so does the strict events_hash computed over it.
+
+orjson is an optional dependency: Forkline never requires it.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    # datetime and dataclass values raise TypeError, as with the standard
+    # library, instead of being encoded
+    _ORJSON_PAYLOAD = (
+        orjson.OPT_SORT_KEYS
+        | orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+
+def dumps_payload(payload: Any) -> str:
+    """
+    Serialize an event payload to sorted-key JSON text for storage.
+
+    The standard library encodes any payload that orjson cannot encode
+    exactly: integers wider than 64 bits, NaN and Infinity (which orjson
+    writes as null), and UUID or plain Enum values (which only orjson
+    accepts). Anything that is not JSON-serializable raises TypeError
+    with either encoder.
+    """
+    if orjson is not None:
+        try:
+            encoded = orjson.dumps(payload, option=_ORJSON_PAYLOAD)
+        except TypeError:
+            pass
+        else:
+            # Decoding and comparing runs in C and still costs well under
+            # a standard library encode
+            if orjson.loads(encoded) == payload:
+                return encoded.decode("utf-8")
+    return json.dumps(payload, sort_keys=True)
+
+
+def dumps_display(value: Any) -> str:
+    """
+    Serialize a value to JSON text for human-readable output.
+
+    Unlike dumps_payload(), key order is preserved and unknown types are
+    rendered with str() instead of raising. Always uses the standard
+    library: display is not on a hot path, and the output (including NaN
+    and Infinity) must not depend on whether orjson is installed.
+    """
+    return json.dumps(value, default=str)
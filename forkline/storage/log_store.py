@@ -0,0 +1,260 @@
+"""
+Append-only log storage backend.
+
+Run and step metadata live in a small SQLite index, exactly as in
+SQLiteStore. Events stay out of SQLite: each run appends them to its own
+log file through a buffered writer, so recording an event is a buffered
+write instead of a B-tree insert.
+
+Layout under the store directory:
+
+    index.db                    runs and steps tables
+    runs/<run_id>/events.log    length-prefixed event records
+
+Each record is a 4-byte big-endian length followed by that many bytes of
+UTF-8 JSON: [step_idx, type, created_at, payload]. A record cut short by a
+crash is ignored on read and truncated before the next append.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import mmap
+import os
+import sqlite3
+import struct
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from ..core.types import Event, Run, Step
+from .codec import dumps_payload
+from .store import _SQL_SELECT_STEPS, SQLiteStore
+
+_RECORD_LENGTH = struct.Struct(">I")
+
+# Size of each run's write buffer. Events reach the file when the buffer
+# fills, when a step ends, or when the run is read back.
+_WRITE_BUFFER_SIZE = 1 << 20
+
+
+def _encode_record(
+    step_idx: int, type: str, created_at: str, payload_json: str
+) -> bytes:
+    body = "[%d,%s,%s,%s]" % (
+        step_idx,
+        json.dumps(type),
+        json.dumps(created_at),
+        payload_json,
+    )
+    data = body.encode("utf-8")
+    return _RECORD_LENGTH.pack(len(data)) + data
+
+
+def _iter_record_spans(data: Union[bytes, mmap.mmap]) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) offsets of each complete record body in data."""
+    offset = 0
+    size = len(data)
+    while offset + _RECORD_LENGTH.size <= size:
+        (length,) = _RECORD_LENGTH.unpack_from(data, offset)
+        start = offset + _RECORD_LENGTH.size
+        end = start + length
+        if end > size:
+            break  # Torn write at the tail
+        yield start, end
+        offset = end
+
+
+@dataclass
+class LogStore(SQLiteStore):
+    """
+    Store that appends events to one log file per run.
+
+    A drop-in replacement for SQLiteStore: the recording and loading API
+    is the same, only events are kept in per-run log files under path
+    (a directory) instead of the events table.
+
+    One store instance should write a given run at a time.
+    """
+
+    path: str = "forkline_logs"
+
+    def __post_init__(self) -> None:
+        # Open log writers and the number of records in each log, by run_id
+        self._writers: Dict[str, io.BufferedWriter] = {}
+        self._event_counts: Dict[str, int] = {}
+        super().__post_init__()
+
+    def _database_path(self) -> str:
+        return os.path.join(self.path, "index.db")
+
+    def close(self) -> None:
+        """Flush and close all logs and the index connection."""
+        with self._lock:
+            for writer in self._writers.values():
+                self._flush(writer)
+                writer.close()
+            self._writers.clear()
+            self._event_counts.clear()
+        super().close()
+
+    def _log_path(self, run_id: str) -> str:
+        if (
+            not run_id
+            or run_id in (".", "..")
+            or "/" in run_id
+            or "\\" in run_id
+            or "\0" in run_id
+        ):
+            raise ValueError(f"run_id {run_id!r} cannot be used as a directory name")
+        return os.path.join(self.path, "runs", run_id, "events.log")
+
+    def _flush(self, writer: io.BufferedWriter) -> None:
+        writer.flush()
+        if self.durability == "strict":
+            os.fsync(writer.fileno())
+
+    def _writer(self, run_id: str) -> io.BufferedWriter:
+        """Return the open writer for run_id, opening its log if needed."""
+        writer = self._writers.get(run_id)
+        if writer is not None:
+            return writer
+
+        log_path = self._log_path(run_id)
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        count = 0
+        valid_end = 0
+        size = 0
+        with self._mapped_log(run_id) as data:
+            if data is not None:
+                size = len(data)
+                for _, valid_end in _iter_record_spans(data):
+                    count += 1
+        if valid_end < size:
+            # Drop a torn record so new records stay reachable
+            with open(log_path, "r+b") as f:
+                f.truncate(valid_end)
+
+        writer = open(log_path, "ab", buffering=_WRITE_BUFFER_SIZE)
+        self._writers[run_id] = writer
+        self._event_counts[run_id] = count
+        return writer
+
+    def start_run(self, run_id: str) -> Run:
+        self._log_path(run_id)  # Validate before anything is recorded
+        return super().start_run(run_id)
+
+    def end_step(self, run_id: str, idx: int) -> None:
+        with self._lock:
+            writer = self._writers.get(run_id)
+            if writer is not None:
+                self._flush(writer)
+        super().end_step(run_id, idx)
+
+    def _count_step_events(
+        self, conn: sqlite3.Connection, run_id: str, idx: int
+    ) -> Optional[int]:
+        # Counting would mean walking the run's whole log. A run has one
+        # writer (see the class docstring), so the digests are trusted.
+        return None
+
+    def append_event(
+        self,
+        run_id: str,
+        step_idx: int,
+        type: str,
+        payload_dict: dict,
+    ) -> Event:
+        return self.append_events(run_id, step_idx, [(type, payload_dict)])[0]
+
+    def append_events(
+        self,
+        run_id: str,
+        step_idx: int,
+        events: Iterable[Tuple[str, dict]],
+    ) -> List[Event]:
+        created_at = self._utc_now()
+        batch = [(type, payload_dict) for type, payload_dict in events]
+        if not batch:
+            return []
+        stored = [(type, dumps_payload(payload_dict)) for type, payload_dict in batch]
+        with self._lock:
+            writer = self._writer(run_id)
+            writer.write(
+                b"".join(
+                    _encode_record(step_idx, type, created_at, payload_json)
+                    for type, payload_json in stored
+                )
+            )
+            first_id = self._event_counts[run_id] + 1
+            self._event_counts[run_id] += len(batch)
+            with self._transaction() as conn:
+                self._feed_step_digests(conn, run_id, step_idx, stored)
+        return [
+            Event(
+                event_id=first_id + offset,
+                run_id=run_id,
+                step_idx=step_idx,
+                type=type,
+                created_at=created_at,
+                payload=payload_dict,
+            )
+            for offset, (type, payload_dict) in enumerate(batch)
+        ]
+
+    @contextmanager
+    def _mapped_log(self, run_id: str) -> Iterator[Optional[mmap.mmap]]:
+        """
+        Map the run's log read-only, or yield None if it is missing or empty.
+
+        Records are decoded straight from the mapping, so the OS pages the
+        file in as it is walked instead of it being copied into one buffer.
+        """
+        with self._lock:
+            writer = self._writers.get(run_id)
+            if writer is not None:
+                writer.flush()
+            try:
+                f = open(self._log_path(run_id), "rb")
+            except FileNotFoundError:
+                f = None
+        if f is None:
+            yield None
+            return
+        with f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield None  # mmap cannot map an empty file
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                yield data
+
+    def _lazy_steps(self, run_id: str) -> Sequence[Step]:
+        # Events of every step share one log that is read front to back, so
+        # there is no per-step read to defer
+        return self._load_steps(run_id)
+
+    def _load_steps(self, run_id: str) -> list[Step]:
+        with self._transaction() as conn:
+            rows = conn.execute(_SQL_SELECT_STEPS, (run_id,)).fetchall()
+
+        # Event ids are 1-based record positions within the run's log
+        events_by_step: Dict[int, List[Event]] = {}
+        with self._mapped_log(run_id) as data:
+            spans = _iter_record_spans(data) if data is not None else ()
+            for event_id, (start, end) in enumerate(spans, start=1):
+                step_idx, type, created_at, payload = json.loads(data[start:end])
+                events_by_step.setdefault(step_idx, []).append(
+                    Event(
+                        event_id=event_id,
+                        run_id=run_id,
+                        step_idx=step_idx,
+                        type=type,
+                        created_at=created_at,
+                        payload=payload,
+                    )
+                )
+
+        return [
+            self._step_from_row(row, events_by_step.get(row["idx"], [])) for row in rows
+        ]
@@ -11,12 +11,15 @@ import os
 import platform
 import sqlite3
 import sys
+import threading
 import uuid
+from contextlib import contextmanager
 from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 from forkline.core.redaction import RedactionPolicy, create_default_policy
+from forkline.storage.clock import utc_now_iso
+from forkline.storage.codec import dumps_payload
 from forkline.version import (
     DEFAULT_FORKLINE_VERSION,
     DEFAULT_SCHEMA_VERSION,
@@ -24,6 +27,43 @@ from forkline.version import (
     SCHEMA_VERSION,
 )
 
+# Statements issued on every record/load call. Keeping the exact same text
+# lets the connection's statement cache reuse the prepared statement.
+_SQL_INSERT_RUN = """
+INSERT INTO runs
+(run_id, schema_version, forkline_version, entrypoint, started_at,
+ python_version, platform, cwd)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_SQL_INSERT_EVENT = """
+INSERT INTO events (run_id, ts, type, payload)
+VALUES (?, ?, ?, ?)
+"""
+_SQL_END_RUN = """
+UPDATE runs
+SET ended_at = ?, status = ?
+WHERE run_id = ?
+"""
+_SQL_SELECT_RUN = """
+SELECT run_id, schema_version, forkline_version, entrypoint,
+       started_at, ended_at, status, python_version, platform, cwd
+FROM runs
+WHERE run_id = ?
+"""
+_SQL_SELECT_EVENTS = """
+SELECT event_id, run_id, ts, type, payload
+FROM events
+WHERE run_id = ?
+ORDER BY event_id ASC
+"""
+_SQL_SELECT_EVENTS_AFTER = """
+SELECT event_id, run_id, ts, type, payload
+FROM events
+WHERE run_id = ? AND event_id > ?
+ORDER BY event_id ASC
+LIMIT ?
+"""
+
 
 @dataclass
 class RunRecorder:
@@ -43,20 +83,90 @@ class RunRecorder:
         # Match SQLiteStore behavior: ensure parent directory exists.
         # Without this, sqlite3.connect() fails if the directory is missing.
         os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        # One connection for the lifetime of the recorder; the lock
+        # serializes access so the recorder can still be shared across threads.
+        self._lock = threading.RLock()
+        self._conn = self._connect()
+        # True while a transaction() block holds the connection
+        self._in_batch = False
         self._init_db()
 
         # Use default SAFE mode policy if none provided
         if self.redaction_policy is None:
             self.redaction_policy = create_default_policy()
 
+    def __enter__(self) -> "RunRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying connection. The recorder is unusable afterwards."""
+        with self._lock:
+            self._conn.close()
+
     def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
         conn.row_factory = sqlite3.Row
+        # Under WAL, NORMAL never corrupts the database; it may only lose
+        # the most recent commits on power loss
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-8000")
+        conn.execute("PRAGMA mmap_size=268435456")
         return conn
 
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Hold the recorder lock and commit (or roll back) on exit."""
+        with self._lock:
+            if self._in_batch:
+                # Part of an open transaction(): it commits on its own exit
+                yield self._conn
+                return
+            with self._conn:
+                yield self._conn
+
+    @contextmanager
+    def transaction(self) -> Iterator["RunRecorder"]:
+        """
+        Group several recorder calls into one write transaction.
+
+        Calls made inside the block share a single BEGIN IMMEDIATE ...
+        COMMIT instead of committing one by one; an exception rolls all of
+        them back. Other threads using this recorder wait until the block
+        exits. Nested blocks join the outermost one.
+
+        Usage:
+            with recorder.transaction():
+                for event_type, payload in events:
+                    recorder.log_event(run_id, event_type, payload)
+        """
+        with self._lock:
+            if self._in_batch:
+                yield self
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._in_batch = True
+            try:
+                yield self
+            except BaseException:
+                self._conn.rollback()
+                raise
+            else:
+                self._conn.commit()
+            finally:
+                self._in_batch = False
+
     def _init_db(self) -> None:
         """Initialize runs.db with versioned schema."""
-        with self._connect() as conn:
+        with self._transaction() as conn:
+            # WAL is persistent on the database file, so set it once here.
+            # Readers no longer block the writer and commits append to the
+            # log instead of rewriting pages through a rollback journal.
+            conn.execute("PRAGMA journal_mode=WAL")
+
             # Runs table with versioned schema
             conn.execute(
                 """
@@ -112,7 +222,7 @@ class RunRecorder:
 
     def _utc_now(self) -> str:
         """ISO8601 UTC timestamp."""
-        return datetime.now(timezone.utc).isoformat()
+        return utc_now_iso()
 
     def _capture_env(self) -> Dict[str, str]:
         """Capture environment snapshot."""
@@ -139,14 +249,9 @@ class RunRecorder:
         started_at = self._utc_now()
         env = self._capture_env()
 
-        with self._connect() as conn:
+        with self._transaction() as conn:
             conn.execute(
-                """
-                INSERT INTO runs 
-                (run_id, schema_version, forkline_version, entrypoint, started_at, 
-                 python_version, platform, cwd)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """,
+                _SQL_INSERT_RUN,
                 (
                     run_id,
                     SCHEMA_VERSION,
@@ -161,6 +266,17 @@ class RunRecorder:
 
         return run_id
 
+    def _redact_to_json(self, event_type: str, payload: Dict[str, Any]) -> str:
+        """Redact a payload and serialize it for storage."""
+        # A policy without rules returns an equal copy; serializing does not
+        # mutate the payload, so the copy can be skipped.
+        if self.redaction_policy.is_noop:
+            return dumps_payload(payload)
+
+        # Apply redaction at storage boundary
+        # This is security-critical: storage never sees raw payloads
+        return dumps_payload(self.redaction_policy.redact(event_type, payload))
+
     def log_event(
         self,
         run_id: str,
@@ -182,20 +298,79 @@ class RunRecorder:
             event_id
         """
         ts = self._utc_now()
+        payload_json = self._redact_to_json(event_type, payload)
 
-        # Apply redaction at storage boundary
-        # This is security-critical: storage never sees raw payloads
-        redacted_payload = self.redaction_policy.redact(event_type, payload)
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                _SQL_INSERT_EVENT, (run_id, ts, event_type, payload_json)
+            )
+            event_id = cursor.lastrowid
+
+        return event_id
+
+    def log_events(
+        self,
+        run_id: str,
+        events: Iterable[Tuple[str, Dict[str, Any]]],
+    ) -> List[int]:
+        """
+        Log several events in one transaction. Append-only.
+
+        Each payload is redacted exactly as in log_event(). All events are
+        committed together, so a multi-event run pays for one fsync instead
+        of one per event.
+
+        Args:
+            run_id: Run identifier
+            events: Ordered (event_type, payload) pairs
+
+        Returns:
+            event_ids, in the same order as events
+        """
+        ts = self._utc_now()
+
+        rows = [
+            (run_id, ts, event_type, self._redact_to_json(event_type, payload))
+            for event_type, payload in events
+        ]
+        if not rows:
+            return []
+
+        with self._transaction() as conn:
+            conn.executemany(_SQL_INSERT_EVENT, rows)
+            # AUTOINCREMENT ids are contiguous within the write transaction
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+
+        return list(range(last_id - len(rows) + 1, last_id + 1))
 
-        payload_json = json.dumps(redacted_payload, sort_keys=True)
+    def log_event_raw(
+        self,
+        run_id: str,
+        event_type: str,
+        payload_json: Union[str, bytes],
+    ) -> int:
+        """
+        Log an already-serialized event payload. Append-only.
 
-        with self._connect() as conn:
+        The payload is stored as given: it is neither parsed nor redacted.
+        Use this only for payloads that already passed through a recorder's
+        redaction, e.g. when copying events from a recorded run.
+
+        Args:
+            run_id: Run identifier
+            event_type: Event type (input, output, tool_call, artifact_ref)
+            payload_json: JSON text of the payload (str or UTF-8 bytes)
+
+        Returns:
+            event_id
+        """
+        if isinstance(payload_json, bytes):
+            payload_json = payload_json.decode("utf-8")
+        ts = self._utc_now()
+
+        with self._transaction() as conn:
             cursor = conn.execute(
-                """
-                INSERT INTO events (run_id, ts, type, payload)
-                VALUES (?, ?, ?, ?)
-                """,
-                (run_id, ts, event_type, payload_json),
+                _SQL_INSERT_EVENT, (run_id, ts, event_type, payload_json)
             )
             event_id = cursor.lastrowid
 
@@ -211,15 +386,15 @@ class RunRecorder:
         """
         ended_at = self._utc_now()
 
-        with self._connect() as conn:
-            conn.execute(
-                """
-                UPDATE runs
-                SET ended_at = ?, status = ?
-                WHERE run_id = ?
-                """,
-                (ended_at, status, run_id),
-            )
+        with self._transaction() as conn:
+            conn.execute(_SQL_END_RUN, (ended_at, status, run_id))
+        with self._lock:
+            # Fold the WAL back into the database once a run is complete so
+            # the -wal file does not keep growing across runs. A checkpoint
+            # cannot run inside an open transaction(); SQLite's automatic
+            # checkpoints cover runs ended there.
+            if not self._in_batch:
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
 
     def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -228,16 +403,8 @@ class RunRecorder:
         Returns:
             Run metadata as dict, or None if not found
         """
-        with self._connect() as conn:
-            row = conn.execute(
-                """
-                SELECT run_id, schema_version, forkline_version, entrypoint, 
-                       started_at, ended_at, status, python_version, platform, cwd
-                FROM runs
-                WHERE run_id = ?
-                """,
-                (run_id,),
-            ).fetchone()
+        with self._transaction() as conn:
+            row = conn.execute(_SQL_SELECT_RUN, (run_id,)).fetchone()
 
             if row is None:
                 return None
@@ -259,21 +426,52 @@ class RunRecorder:
         Returns:
             List of events
         """
-        with self._connect() as conn:
-            rows = conn.execute(
-                """
-                SELECT event_id, run_id, ts, type, payload
-                FROM events
-                WHERE run_id = ?
-                ORDER BY event_id ASC
-                """,
-                (run_id,),
-            ).fetchall()
-
-            events = []
-            for row in rows:
-                event = dict(row)
-                event["payload"] = json.loads(event["payload"])
-                events.append(event)
-
-            return events
+        with self._transaction() as conn:
+            # Plain tuples: rows are unpacked by position, so a sqlite3.Row
+            # per event would only be converted to a dict and dropped
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            rows = cursor.execute(_SQL_SELECT_EVENTS, (run_id,)).fetchall()
+
+        return _event_dicts(rows)
+
+    def get_events_iter(
+        self, run_id: str, batch_size: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the events of a run, ordered by event_id.
+
+        Yields the same dicts as get_events(), but reads them batch_size rows
+        at a time, so at most one batch of decoded payloads is held in
+        memory. Each batch is a separate short query; the recorder is not
+        locked while the caller consumes events.
+
+        Yields:
+            Events, one at a time
+        """
+        last_event_id = -1
+        while True:
+            with self._transaction() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = None
+                rows = cursor.execute(
+                    _SQL_SELECT_EVENTS_AFTER, (run_id, last_event_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            yield from _event_dicts(rows)
+            last_event_id = rows[-1][0]
+
+
+def _event_dicts(rows: List[Tuple[Any, ...]]) -> List[Dict[str, Any]]:
+    """Turn (event_id, run_id, ts, type, payload) rows into event dicts."""
+    return [
+        {
+            "event_id": event_id,
+            "run_id": run_id,
+            "ts": ts,
+            "type": event_type,
+            "payload": json.loads(payload),
+        }
+        for event_id, run_id, ts, event_type, payload in rows
+    ]
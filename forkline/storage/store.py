@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 import sqlite3
+import threading
+from contextlib import contextmanager
 from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Iterable, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
+from ..core.canon import CanonListHasher
 from ..core.types import Event, Run, Step
 from ..version import (
     DEFAULT_FORKLINE_VERSION,
@@ -14,23 +17,210 @@ from ..version import (
     FORKLINE_VERSION,
     SCHEMA_VERSION,
 )
+from .clock import utc_now_iso
+from .codec import dumps_payload
+
+# PRAGMA synchronous level for each durability mode. Under WAL, NORMAL
+# never corrupts the database; it may only lose the most recent commits on
+# power loss. "fast" skips fsync entirely and is meant for throwaway runs.
+_SYNCHRONOUS_BY_DURABILITY = {
+    "strict": "FULL",
+    "normal": "NORMAL",
+    "fast": "OFF",
+}
+
+
+# Statements issued on every record/load call. Keeping the exact same text
+# lets the connection's statement cache reuse the prepared statement.
+_SQL_INSERT_RUN = """
+INSERT OR REPLACE INTO runs
+(run_id, created_at, forkline_version, schema_version)
+VALUES (?, ?, ?, ?)
+"""
+_SQL_INSERT_STEP = """
+INSERT INTO steps (run_id, idx, name, started_at, ended_at)
+VALUES (?, ?, ?, ?, ?)
+"""
+_SQL_SELECT_STEP = """
+SELECT step_id, run_id, idx, name, started_at, ended_at
+FROM steps
+WHERE run_id = ? AND idx = ?
+"""
+_SQL_END_STEP = """
+UPDATE steps
+SET ended_at = ?, input_hash = ?, output_hash = ?, events_hash = ?
+WHERE run_id = ? AND idx = ?
+"""
+_SQL_CLEAR_STEP_HASHES = """
+UPDATE steps
+SET input_hash = NULL, output_hash = NULL, events_hash = NULL
+WHERE run_id = ? AND idx = ?
+"""
+_SQL_INSERT_EVENT = """
+INSERT INTO events (run_id, step_idx, type, payload_json, created_at)
+VALUES (?, ?, ?, ?, ?)
+"""
+_SQL_SELECT_RUN = """
+SELECT run_id, created_at, forkline_version, schema_version
+FROM runs WHERE run_id = ?
+"""
+_SQL_SELECT_STEPS = """
+SELECT step_id, run_id, idx, name, started_at, ended_at,
+       input_hash, output_hash, events_hash
+FROM steps
+WHERE run_id = ?
+ORDER BY idx ASC
+"""
+_SQL_SELECT_RUN_EVENTS = """
+SELECT event_id, run_id, step_idx, type, payload_json, created_at
+FROM events
+WHERE run_id = ?
+ORDER BY step_idx ASC, event_id ASC
+"""
+_SQL_COUNT_STEP_EVENTS = """
+SELECT COUNT(*) FROM events WHERE run_id = ? AND step_idx = ?
+"""
+_SQL_SELECT_STEP_EVENTS = """
+SELECT event_id, run_id, step_idx, type, payload_json, created_at
+FROM events
+WHERE run_id = ? AND step_idx = ?
+ORDER BY event_id ASC
+"""
+
+
+def _fetch_tuples(
+    conn: sqlite3.Connection, sql: str, params: Tuple[Any, ...]
+) -> List[Tuple[Any, ...]]:
+    """
+    Run a query whose rows come back as plain tuples.
+
+    The connection's sqlite3.Row factory builds a row object per result for
+    name lookups; event queries can return thousands of rows that are only
+    unpacked positionally, so they skip it.
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    return cursor.execute(sql, params).fetchall()
+
+
+class _StepDigests:
+    """
+    Running digests for one open step.
+
+    input/output follow find_first_divergence: sha256 of canon() over the
+    decoded payloads of that event type. events is strict: sha256 over the
+    exact stored (type, payload_json) text of every event, so equal digests
+    mean the events are identical as stored.
+    """
+
+    def __init__(self) -> None:
+        self.input = CanonListHasher()
+        self.output = CanonListHasher()
+        self.events = hashlib.sha256()
+        # Events fed so far, checked against the stored count on end_step()
+        self.count = 0
+
+    def update(self, type: str, payload_json: str) -> None:
+        self.count += 1
+        if type == "input":
+            self.input.update(json.loads(payload_json))
+        elif type == "output":
+            self.output.update(json.loads(payload_json))
+        for part in (type, payload_json):
+            data = part.encode("utf-8")
+            self.events.update(b"%d:" % len(data))
+            self.events.update(data)
+
+    def hexdigests(self) -> Tuple[str, str, str]:
+        return (
+            self.input.hexdigest(),
+            self.output.hexdigest(),
+            self.events.hexdigest(),
+        )
 
 
 @dataclass
 class SQLiteStore:
+    """
+    Store that records runs, steps and events in one SQLite database.
+
+    Step digests (input_hash, output_hash, events_hash) are computed from
+    the events this instance appends while the step is open, so one store
+    instance should write a given step from start_step() to end_step().
+    If events reach the step another way (a second store instance, or
+    appends after end_step()), its digests are left NULL rather than
+    recorded stale, and comparisons fall back to the events themselves.
+    """
+
     path: str = "forkline.db"
+    durability: str = "normal"
 
     def __post_init__(self) -> None:
-        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if self.durability not in _SYNCHRONOUS_BY_DURABILITY:
+            raise ValueError(
+                f"Unknown durability {self.durability!r}; expected one of "
+                f"{sorted(_SYNCHRONOUS_BY_DURABILITY)}"
+            )
+        os.makedirs(os.path.dirname(self._database_path()) or ".", exist_ok=True)
+        # One connection for the lifetime of the store; the lock serializes
+        # access so the store can still be shared across threads.
+        self._lock = threading.RLock()
+        self._conn = self._connect()
+        self._closed = False
+        # Running digests of input/output payloads for steps that are open
+        # in this store, keyed by (run_id, idx). Persisted on end_step().
+        self._step_digests: Dict[Tuple[str, int], _StepDigests] = {}
         self._init_db()
 
+    def __enter__(self) -> "SQLiteStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the underlying connection. The store is unusable afterwards.
+
+        Closing an already closed store does nothing.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            # Let SQLite refresh planner statistics it found missing or stale
+            self._conn.execute("PRAGMA optimize")
+            self._conn.close()
+
+    def _database_path(self) -> str:
+        """Path of the SQLite database file."""
+        return self.path
+
     def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.path)
+        # timeout doubles as busy_timeout: wait up to 5s on a locked database
+        conn = sqlite3.connect(
+            self._database_path(), timeout=5.0, check_same_thread=False
+        )
         conn.row_factory = sqlite3.Row
+        synchronous = _SYNCHRONOUS_BY_DURABILITY[self.durability]
+        conn.execute(f"PRAGMA synchronous={synchronous}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute("PRAGMA mmap_size=268435456")
         return conn
 
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Hold the store lock and commit (or roll back) on exit."""
+        with self._lock, self._conn:
+            yield self._conn
+
     def _init_db(self) -> None:
-        with self._connect() as conn:
+        with self._transaction() as conn:
+            # WAL is persistent on the database file, so set it once here.
+            # Readers no longer block the writer and commits append to the
+            # log instead of rewriting pages through a rollback journal.
+            conn.execute("PRAGMA journal_mode=WAL")
             conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS runs (
@@ -52,10 +242,14 @@ class SQLiteStore:
                     idx INTEGER NOT NULL,
                     name TEXT NOT NULL,
                     started_at TEXT NOT NULL,
-                    ended_at TEXT
+                    ended_at TEXT,
+                    input_hash TEXT,
+                    output_hash TEXT,
+                    events_hash TEXT
                 )
                 """
             )
+            self._migrate_add_step_hash_columns(conn)
 
             conn.execute(
                 """
@@ -70,6 +264,22 @@ class SQLiteStore:
                 """
             )
 
+            # Step and event lookups filter on run_id and the step index.
+            # Event rows within a step come back in index order (rowid is the
+            # implicit last key), so ORDER BY event_id needs no sort.
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_steps_run_idx
+                ON steps(run_id, idx)
+                """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_events_run_step
+                ON events(run_id, step_idx)
+                """
+            )
+
     def _migrate_add_version_columns(self, conn: sqlite3.Connection) -> None:
         """
         Migration: add version columns to existing databases.
@@ -91,18 +301,48 @@ class SQLiteStore:
             except sqlite3.OperationalError:
                 pass  # Column already exists
 
+    def _migrate_add_step_hash_columns(self, conn: sqlite3.Connection) -> None:
+        """Migration: add step digest columns to existing databases."""
+        try:
+            conn.execute(
+                "SELECT input_hash, output_hash, events_hash FROM steps LIMIT 1"
+            )
+        except sqlite3.OperationalError:
+            for column in ("input_hash", "output_hash", "events_hash"):
+                try:
+                    conn.execute(f"ALTER TABLE steps ADD COLUMN {column} TEXT")
+                except sqlite3.OperationalError:
+                    pass  # Column already exists
+
+    def _feed_step_digests(
+        self,
+        conn: sqlite3.Connection,
+        run_id: str,
+        step_idx: int,
+        events: Iterable[Tuple[str, str]],
+    ) -> None:
+        """
+        Feed (type, payload_json) pairs into the step's running digests.
+
+        Hashes the stored JSON rather than the caller's dict so the digests
+        match what comparisons see after load_run(). If the step is not open
+        in this store, its digests can no longer be trusted and are cleared.
+        """
+        digests = self._step_digests.get((run_id, step_idx))
+        if digests is None:
+            conn.execute(_SQL_CLEAR_STEP_HASHES, (run_id, step_idx))
+            return
+        for type, payload_json in events:
+            digests.update(type, payload_json)
+
     def _utc_now(self) -> str:
-        return datetime.now(timezone.utc).isoformat()
+        return utc_now_iso()
 
     def start_run(self, run_id: str) -> Run:
         created_at = self._utc_now()
-        with self._connect() as conn:
+        with self._transaction() as conn:
             conn.execute(
-                """
-                INSERT OR REPLACE INTO runs 
-                (run_id, created_at, forkline_version, schema_version) 
-                VALUES (?, ?, ?, ?)
-                """,
+                _SQL_INSERT_RUN,
                 (run_id, created_at, FORKLINE_VERSION, SCHEMA_VERSION),
             )
         return Run(
@@ -115,22 +355,10 @@ class SQLiteStore:
 
     def start_step(self, run_id: str, idx: int, name: str) -> Step:
         started_at = self._utc_now()
-        with self._connect() as conn:
-            conn.execute(
-                """
-                INSERT INTO steps (run_id, idx, name, started_at, ended_at)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (run_id, idx, name, started_at, None),
-            )
-            step_row = conn.execute(
-                """
-                SELECT step_id, run_id, idx, name, started_at, ended_at
-                FROM steps
-                WHERE run_id = ? AND idx = ?
-                """,
-                (run_id, idx),
-            ).fetchone()
+        with self._transaction() as conn:
+            conn.execute(_SQL_INSERT_STEP, (run_id, idx, name, started_at, None))
+            self._step_digests[(run_id, idx)] = _StepDigests()
+            step_row = conn.execute(_SQL_SELECT_STEP, (run_id, idx)).fetchone()
         return Step(
             step_id=step_row["step_id"],
             run_id=step_row["run_id"],
@@ -143,15 +371,22 @@ class SQLiteStore:
 
     def end_step(self, run_id: str, idx: int) -> None:
         ended_at = self._utc_now()
-        with self._connect() as conn:
-            conn.execute(
-                """
-                UPDATE steps
-                SET ended_at = ?
-                WHERE run_id = ? AND idx = ?
-                """,
-                (ended_at, run_id, idx),
-            )
+        with self._transaction() as conn:
+            digests = self._step_digests.pop((run_id, idx), None)
+            hashes: Tuple[Optional[str], ...] = (None, None, None)
+            if digests is not None:
+                stored = self._count_step_events(conn, run_id, idx)
+                # Another writer appended to this step: the digests only
+                # cover this instance's events
+                if stored is None or stored == digests.count:
+                    hashes = digests.hexdigests()
+            conn.execute(_SQL_END_STEP, (ended_at, *hashes, run_id, idx))
+
+    def _count_step_events(
+        self, conn: sqlite3.Connection, run_id: str, idx: int
+    ) -> Optional[int]:
+        """Number of stored events of a step, or None if it cannot be counted."""
+        return conn.execute(_SQL_COUNT_STEP_EVENTS, (run_id, idx)).fetchone()[0]
 
     def append_event(
         self,
@@ -161,48 +396,95 @@ class SQLiteStore:
         payload_dict: dict,
     ) -> Event:
         created_at = self._utc_now()
-        payload_json = json.dumps(payload_dict, sort_keys=True)
-        with self._connect() as conn:
-            conn.execute(
-                """
-                INSERT INTO events (run_id, step_idx, type, payload_json, created_at)
-                VALUES (?, ?, ?, ?, ?)
-                """,
+        payload_json = dumps_payload(payload_dict)
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                _SQL_INSERT_EVENT,
                 (run_id, step_idx, type, payload_json, created_at),
             )
-            row = conn.execute(
-                """
-                SELECT event_id, run_id, step_idx, type, payload_json, created_at
-                FROM events
-                WHERE run_id = ? AND step_idx = ?
-                ORDER BY event_id DESC
-                LIMIT 1
-                """,
-                (run_id, step_idx),
-            ).fetchone()
+            self._feed_step_digests(conn, run_id, step_idx, [(type, payload_json)])
         return Event(
-            event_id=row["event_id"],
-            run_id=row["run_id"],
-            step_idx=row["step_idx"],
-            type=row["type"],
-            created_at=row["created_at"],
+            event_id=cursor.lastrowid,
+            run_id=run_id,
+            step_idx=step_idx,
+            type=type,
+            created_at=created_at,
             payload=payload_dict,
         )
 
+    def append_events(
+        self,
+        run_id: str,
+        step_idx: int,
+        events: Iterable[Tuple[str, dict]],
+    ) -> List[Event]:
+        """
+        Append several events to a step in a single transaction.
+
+        Equivalent to calling append_event() once per (type, payload_dict)
+        pair, but pays for one commit instead of one per event.
+        """
+        created_at = self._utc_now()
+        batch = [(type, payload_dict) for type, payload_dict in events]
+        if not batch:
+            return []
+        rows = [
+            (
+                run_id,
+                step_idx,
+                type,
+                dumps_payload(payload_dict),
+                created_at,
+            )
+            for type, payload_dict in batch
+        ]
+        with self._transaction() as conn:
+            conn.executemany(_SQL_INSERT_EVENT, rows)
+            self._feed_step_digests(
+                conn, run_id, step_idx, [(row[2], row[3]) for row in rows]
+            )
+            # AUTOINCREMENT ids are contiguous within the write transaction
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        first_id = last_id - len(batch) + 1
+        return [
+            Event(
+                event_id=first_id + offset,
+                run_id=run_id,
+                step_idx=step_idx,
+                type=type,
+                created_at=created_at,
+                payload=payload_dict,
+            )
+            for offset, (type, payload_dict) in enumerate(batch)
+        ]
+
     def load_run(self, run_id: str) -> Optional[Run]:
-        with self._connect() as conn:
-            row = conn.execute(
-                """
-                SELECT run_id, created_at, forkline_version, schema_version 
-                FROM runs WHERE run_id = ?
-                """,
-                (run_id,),
-            ).fetchone()
+        with self._transaction() as conn:
+            row = conn.execute(_SQL_SELECT_RUN, (run_id,)).fetchone()
             if row is None:
                 return None
 
-        steps = self._load_steps(run_id)
+        return self._run_from_row(row, self._load_steps(run_id))
+
+    def load_run_lazy(self, run_id: str) -> Optional[Run]:
+        """
+        Load a run whose steps read their events on first access.
 
+        Step metadata is read up front, so len(run.steps) is known, but a
+        step's events are only loaded when that step is indexed or iterated
+        to. Callers that stop early, such as a comparison halting at the
+        first divergence, skip loading the rest of the run. run.steps is a
+        read-only sequence rather than a list, and the store must stay open
+        while it is used.
+        """
+        with self._transaction() as conn:
+            row = conn.execute(_SQL_SELECT_RUN, (run_id,)).fetchone()
+            if row is None:
+                return None
+
+        return self._run_from_row(row, self._lazy_steps(run_id))
+
+    def _run_from_row(self, row: sqlite3.Row, steps: Sequence[Step]) -> Run:
         # Backward compat: use defaults for older artifacts missing version fields
         forkline_version = row["forkline_version"]
         schema_version = row["schema_version"]
@@ -221,49 +503,76 @@ class SQLiteStore:
         )
 
     def _load_steps(self, run_id: str) -> list[Step]:
-        with self._connect() as conn:
-            rows = conn.execute(
-                """
-                SELECT step_id, run_id, idx, name, started_at, ended_at
-                FROM steps
-                WHERE run_id = ?
-                ORDER BY idx ASC
-                """,
-                (run_id,),
-            ).fetchall()
-        steps: list[Step] = []
-        for row in rows:
-            events = list(self._load_events(run_id, row["idx"]))
-            steps.append(
-                Step(
-                    step_id=row["step_id"],
-                    run_id=row["run_id"],
-                    idx=row["idx"],
-                    name=row["name"],
-                    started_at=row["started_at"],
-                    ended_at=row["ended_at"],
-                    events=events,
-                )
-            )
-        return steps
+        # One query for the run's events instead of one per step; the
+        # (run_id, step_idx) index returns them already grouped by step
+        with self._transaction() as conn:
+            rows = conn.execute(_SQL_SELECT_STEPS, (run_id,)).fetchall()
+            event_rows = _fetch_tuples(conn, _SQL_SELECT_RUN_EVENTS, (run_id,))
+
+        events_by_step: Dict[int, List[Event]] = {}
+        for event_row in event_rows:
+            event = self._event_from_row(event_row)
+            events_by_step.setdefault(event.step_idx, []).append(event)
+        return [
+            self._step_from_row(row, events_by_step.get(row["idx"], [])) for row in rows
+        ]
+
+    def _lazy_steps(self, run_id: str) -> Sequence[Step]:
+        with self._transaction() as conn:
+            rows = conn.execute(_SQL_SELECT_STEPS, (run_id,)).fetchall()
+        return _LazySteps(self, run_id, rows)
+
+    def _step_from_row(self, row: sqlite3.Row, events: List[Event]) -> Step:
+        return Step(
+            step_id=row["step_id"],
+            run_id=row["run_id"],
+            idx=row["idx"],
+            name=row["name"],
+            started_at=row["started_at"],
+            ended_at=row["ended_at"],
+            events=events,
+            input_hash=row["input_hash"],
+            output_hash=row["output_hash"],
+            events_hash=row["events_hash"],
+        )
 
     def _load_events(self, run_id: str, step_idx: int) -> Iterable[Event]:
-        with self._connect() as conn:
-            rows = conn.execute(
-                """
-                SELECT event_id, run_id, step_idx, type, payload_json, created_at
-                FROM events
-                WHERE run_id = ? AND step_idx = ?
-                ORDER BY event_id ASC
-                """,
-                (run_id, step_idx),
-            ).fetchall()
+        with self._transaction() as conn:
+            rows = _fetch_tuples(conn, _SQL_SELECT_STEP_EVENTS, (run_id, step_idx))
         for row in rows:
-            yield Event(
-                event_id=row["event_id"],
-                run_id=row["run_id"],
-                step_idx=row["step_idx"],
-                type=row["type"],
-                created_at=row["created_at"],
-                payload=json.loads(row["payload_json"]),
-            )
+            yield self._event_from_row(row)
+
+    def _event_from_row(self, row: Tuple[Any, ...]) -> Event:
+        event_id, run_id, step_idx, type, payload_json, created_at = row
+        return Event(
+            event_id=event_id,
+            run_id=run_id,
+            step_idx=step_idx,
+            type=type,
+            created_at=created_at,
+            payload=json.loads(payload_json),
+        )
+
+
+class _LazySteps(Sequence[Step]):
+    """Steps of a run, each loaded with its events on first access."""
+
+    def __init__(self, store: SQLiteStore, run_id: str, rows: List[sqlite3.Row]):
+        self._store = store
+        self._run_id = run_id
+        self._rows = rows
+        self._steps: List[Optional[Step]] = [None] * len(rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._rows)))]
+        step = self._steps[index]
+        if step is None:
+            row = self._rows[index]
+            events = list(self._store._load_events(self._run_id, row["idx"]))
+            step = self._store._step_from_row(row, events)
+            self._steps[index] = step
+        return step
@@ -0,0 +1,139 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from forkline.cli import main
+from forkline.storage import SQLiteStore
+
+
+def _record(path: str, run_id: str, result: str) -> None:
+    with SQLiteStore(path=path) as store:
+        store.start_run(run_id)
+        store.start_step(run_id, 0, "plan")
+        store.append_event(run_id, 0, "input", {"prompt": "hello"})
+        store.append_event(run_id, 0, "output", {"result": result})
+        store.end_step(run_id, 0)
+
+
+def _diff(argv: list[str]) -> tuple[int, str]:
+    out = io.StringIO()
+    code = 0
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(io.StringIO()):
+        try:
+            main(["diff", *argv])
+        except SystemExit as exc:
+            code = exc.code
+    return code, out.getvalue()
+
+
+class DiffCommandTest(unittest.TestCase):
+    def test_runs_in_separate_databases(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_a = os.path.join(temp_dir, "prod.db")
+            db_b = os.path.join(temp_dir, "staging.db")
+            _record(db_a, "run", "world")
+            _record(db_b, "run", "there")
+
+            code, out = _diff(
+                ["run", "run", "--db", db_a, "--db-b", db_b, "--format", "json"]
+            )
+
+            self.assertEqual(code, 1)
+            self.assertEqual(json.loads(out)["status"], "output_divergence")
+
+    def test_identical_runs_exit_zero(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "forkline.db")
+            _record(db_path, "a", "world")
+            _record(db_path, "b", "world")
+
+            code, out = _diff(["a", "b", "--db", db_path])
+
+            self.assertEqual(code, 0)
+            self.assertIn("exact_match", out)
+
+    def test_text_diff_shows_non_finite_floats(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "forkline.db")
+            with SQLiteStore(path=db_path) as store:
+                for run_id, value in (("a", 1.5), ("b", float("nan"))):
+                    store.start_run(run_id)
+                    store.start_step(run_id, 0, "plan")
+                    store.append_event(
+                        run_id, 0, "output", {"v": value, "w": float("inf")}
+                    )
+                    store.end_step(run_id, 0)
+
+            code, out = _diff(["a", "b", "--db", db_path, "--show", "output"])
+
+            self.assertEqual(code, 1)
+            self.assertIn("1.5 -> NaN", out)
+
+    def test_missing_run_exits_with_error(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "forkline.db")
+            _record(db_path, "a", "world")
+
+            code, _ = _diff(["a", "nope", "--db", db_path])
+
+            self.assertEqual(code, 1)
+
+
+class LazyImportTest(unittest.TestCase):
+    def _run(self, code: str) -> str:
+        return subprocess.run(
+            [sys.executable, "-c", code],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+
+    def test_cli_does_not_load_replay_or_redaction(self) -> None:
+        loaded = self._run(
+            "import sys, forkline.cli; "
+            "print(' '.join(m for m in sys.modules if m.startswith('forkline')))"
+        ).split()
+        self.assertIn("forkline.core.first_divergence", loaded)
+        self.assertNotIn("forkline.core.replay", loaded)
+        self.assertNotIn("forkline.core.redaction", loaded)
+        self.assertNotIn("forkline.storage.recorder", loaded)
+
+    def test_submodule_import_keeps_same_named_functions(self) -> None:
+        out = self._run(
+            "import forkline.core.canon, forkline.core.replay, "
+            "forkline.core.json_diff; "
+            "from forkline.core import canon, json_diff, replay; "
+            "print(all(type(f).__name__ == 'function' "
+            "for f in (canon, json_diff, replay)))"
+        )
+        self.assertEqual(out.strip(), "True")
+
+    def test_submodules_are_reachable_as_attributes(self) -> None:
+        out = self._run(
+            "import forkline; "
+            "mods = (forkline.core, forkline.storage, forkline.version, "
+            "forkline.tracer, forkline.storage.store, forkline.core.diff); "
+            "print(' '.join(m.__name__ for m in mods)); "
+            "print('store' in dir(forkline.storage))"
+        )
+        self.assertEqual(
+            out.split(),
+            [
+                "forkline.core",
+                "forkline.storage",
+                "forkline.version",
+                "forkline.tracer",
+                "forkline.storage.store",
+                "forkline.core.diff",
+                "True",
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
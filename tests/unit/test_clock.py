@@ -0,0 +1,37 @@
+"""Tests for recorded timestamps."""
+
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from forkline.storage import clock
+
+
+def _isoformat(ns: int) -> str:
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return (epoch + timedelta(microseconds=ns // 1000)).isoformat()
+
+
+class TestUtcNowIso(unittest.TestCase):
+    """utc_now_iso must render exactly like datetime.isoformat()."""
+
+    def test_matches_datetime_isoformat(self):
+        times = [
+            1_700_000_000_123_456_789,
+            1_700_000_000_999_999_999,  # Same second, reuses the prefix
+            1_700_000_001_000_000_000,  # Next second, zero microseconds
+            1_700_000_001_000_001_000,
+            951_782_400_000_500_000,  # Leap day
+        ]
+        for ns in times:
+            with mock.patch.object(clock.time, "time_ns", return_value=ns):
+                self.assertEqual(clock.utc_now_iso(), _isoformat(ns))
+
+    def test_current_time_parses_as_utc(self):
+        parsed = datetime.fromisoformat(clock.utc_now_iso())
+        self.assertEqual(parsed.utcoffset(), timedelta(0))
+        self.assertLess(abs(datetime.now(timezone.utc) - parsed), timedelta(seconds=5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""Tests for payload JSON encoding."""
+
+import dataclasses
+import datetime
+import enum
+import json
+import math
+import os
+import tempfile
+import unittest
+import uuid
+from unittest import mock
+
+from forkline.storage import codec
+from forkline.storage.recorder import RunRecorder
+
+
+class TestDumpsPayload(unittest.TestCase):
+    """dumps_payload must round-trip identically with or without orjson."""
+
+    PAYLOAD = {
+        "b": 1,
+        "a": [1.5, None, True, "é"],
+        "nested": {"z": {"y": "x"}, "c": []},
+    }
+
+    def test_round_trips_with_active_encoder(self):
+        text = codec.dumps_payload(self.PAYLOAD)
+        self.assertEqual(json.loads(text), self.PAYLOAD)
+
+    def test_round_trips_with_stdlib_fallback(self):
+        with mock.patch.object(codec, "orjson", None):
+            text = codec.dumps_payload(self.PAYLOAD)
+        self.assertEqual(text, json.dumps(self.PAYLOAD, sort_keys=True))
+
+    def test_keys_are_sorted(self):
+        text = codec.dumps_payload({"b": 1, "a": {"d": 2, "c": 3}})
+        self.assertLess(text.index('"a"'), text.index('"b"'))
+        self.assertLess(text.index('"c"'), text.index('"d"'))
+
+    def test_wide_integers_fall_back(self):
+        value = {"big": 2**70}
+        self.assertEqual(json.loads(codec.dumps_payload(value)), value)
+
+    def test_unserializable_raises_type_error(self):
+        with self.assertRaises(TypeError):
+            codec.dumps_payload({"obj": object()})
+
+
+@unittest.skipIf(codec.orjson is None, "orjson is not installed")
+class TestDumpsPayloadWithOrjson(unittest.TestCase):
+    """With orjson installed, stored payloads match the stdlib-only path."""
+
+    def test_plain_payload_uses_orjson(self):
+        with mock.patch.object(codec.json, "dumps") as stdlib_dumps:
+            text = codec.dumps_payload({"b": 1, "a": [1.5, None]})
+        stdlib_dumps.assert_not_called()
+        self.assertEqual(text, '{"a":[1.5,null],"b":1}')
+
+    def test_non_finite_floats_are_kept(self):
+        value = {"v": float("inf"), "w": 1.5, "n": float("-inf")}
+        text = codec.dumps_payload(value)
+        self.assertEqual(text, json.dumps(value, sort_keys=True))
+        self.assertTrue(math.isnan(json.loads(codec.dumps_payload([math.nan]))[0]))
+
+    def test_stdlib_rejected_types_raise_type_error(self):
+        @dataclasses.dataclass
+        class Point:
+            x: int
+
+        class Color(enum.Enum):
+            RED = 1
+
+        values = [
+            datetime.datetime(2024, 1, 1),
+            datetime.date(2024, 1, 1),
+            Point(1),
+            uuid.UUID(int=1),
+            Color.RED,
+        ]
+        for value in values:
+            with self.assertRaises(TypeError):
+                codec.dumps_payload({"v": value})
+
+    def test_recorder_round_trips_non_finite_floats(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, "test.db")
+            with RunRecorder(db_path=db_path) as recorder:
+                run_id = recorder.start_run(entrypoint="test.py")
+                recorder.log_event(run_id, "input", {"v": float("inf"), "w": 1.5})
+                payload = recorder.get_events(run_id)[0]["payload"]
+        self.assertEqual(payload, {"v": float("inf"), "w": 1.5})
+
+
+class TestDumpsDisplay(unittest.TestCase):
+    """dumps_display renders anything, falling back to str()."""
+
+    def test_unknown_types_use_str(self):
+        marker = object()
+        self.assertEqual(json.loads(codec.dumps_display(marker)), str(marker))
+
+    def test_matches_stdlib_values(self):
+        value = {"x": [1, "two", None]}
+        self.assertEqual(json.loads(codec.dumps_display(value)), value)
+
+    def test_matches_stdlib_text(self):
+        """Output is the same with or without orjson, non-finite floats included."""
+        for value in (
+            float("nan"),
+            {"v": [float("inf"), float("-inf")]},
+            {"b": [1, 2], "a": "é", "big": 1e20},
+        ):
+            self.assertEqual(codec.dumps_display(value), json.dumps(value, default=str))
+
+
+if __name__ == "__main__":
+    unittest.main()
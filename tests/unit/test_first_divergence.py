@@ -8,8 +8,16 @@ from __future__ import annotations
 
 import json
 import unittest
-
-from forkline.core.canon import bytes_preview, canon, sha256_hex
+from dataclasses import replace
+from unittest import mock
+
+from forkline.core import first_divergence
+from forkline.core.canon import (
+    CanonListHasher,
+    bytes_preview,
+    canon,
+    sha256_hex,
+)
 from forkline.core.first_divergence import (
     DivergenceType,
     find_first_divergence,
@@ -82,6 +90,8 @@ class TestCanonStability(unittest.TestCase):
     def test_newline_normalization(self):
         self.assertEqual(canon("a\r\nb"), canon("a\nb"))
         self.assertEqual(canon("a\rb"), canon("a\nb"))
+        self.assertEqual(canon("caf\u00e9\r\n"), canon("cafe\u0301\n"))
+        self.assertEqual(canon("plain ascii"), b"plain ascii")
 
     def test_float_stability(self):
         a = {"val": 1.0000000000000002}
@@ -90,6 +100,15 @@ class TestCanonStability(unittest.TestCase):
     def test_negative_zero(self):
         self.assertEqual(canon({"v": -0.0}), canon({"v": 0.0}))
 
+    def test_float_bytes_pinned(self):
+        value = {"a": 0.1, "b": 1e16, "c": 5e-324, "d": -1.5}
+        self.assertEqual(canon(value), b'{"a":0.1,"b":1e+16,"c":5e-324,"d":-1.5}')
+
+    def test_non_str_keys_sorted_as_strings(self):
+        self.assertEqual(canon({10: "x", 9: "y"}), b'{"10":"x","9":"y"}')
+        # Keys that stringify alike: the later key wins
+        self.assertEqual(canon({1: "int", "1": "str"}), b'{"1":"str"}')
+
     def test_bytes_passthrough(self):
         data = b"\x00\x01\x02\x03"
         self.assertEqual(canon(data), data)
@@ -123,6 +142,25 @@ class TestCanonStability(unittest.TestCase):
     def test_bool_vs_int_distinct(self):
         self.assertNotEqual(canon(True), canon(1))
 
+    def test_list_hasher_matches_canon(self):
+        items = [{"b": 1, "a": "caf\u00e9"}, [1, 2.5], None]
+        hasher = CanonListHasher()
+        self.assertEqual(hasher.hexdigest(), sha256_hex(canon([])))
+        for item in items:
+            hasher.update(item)
+        self.assertEqual(hasher.hexdigest(), sha256_hex(canon(items)))
+
+    def test_subclasses_match_builtin_types(self):
+        from collections import OrderedDict
+
+        class Label(str):
+            pass
+
+        self.assertEqual(
+            canon(OrderedDict([("b", 1), ("a", [1.5])])), canon({"a": [1.5], "b": 1})
+        )
+        self.assertEqual(canon({"k": Label("caf\u00e9")}), canon({"k": "cafe\u0301"}))
+
 
 # ============================================================================
 # JSON diff patch determinism
@@ -210,6 +248,31 @@ class TestJsonDiffDeterminism(unittest.TestCase):
         self.assertEqual(len(ops), 1)
         self.assertEqual(ops[0]["op"], "replace")
 
+    def test_nested_list_tail_ops_follow_element_diffs(self):
+        ops = json_diff({"l": [{"x": 1}, 2]}, {"l": [{"x": 2}, 2, 3]})
+        self.assertEqual([op["path"] for op in ops], ["$.l[0].x", "$.l[2]"])
+
+    def test_mixed_key_types_sort_as_strings(self):
+        ops = json_diff({"b": 1, 2: "x"}, {"b": 2, "a": 0})
+        self.assertEqual(
+            [(op["op"], op["path"]) for op in ops],
+            [("remove", "$.2"), ("add", "$.a"), ("replace", "$.b")],
+        )
+
+    def test_shared_subtrees_are_not_walked(self):
+        shared = {"config": [float("nan"), {"x": 1}]}
+        self.assertEqual(json_diff(shared, shared), [])
+        ops = json_diff({"a": shared, "b": 1}, {"a": shared, "b": 2})
+        self.assertEqual([op["path"] for op in ops], ["$.b"])
+
+    def test_deep_nesting_does_not_hit_recursion_limit(self):
+        old, new = 1, 2
+        for _ in range(5000):
+            old, new = {"k": old}, {"k": new}
+        ops = json_diff(old, new)
+        self.assertEqual(len(ops), 1)
+        self.assertEqual(ops[0]["path"], "$" + ".k" * 5000)
+
 
 # ============================================================================
 # First-divergence engine
@@ -491,6 +554,117 @@ class TestFirstDivergenceEngine(unittest.TestCase):
         self.assertEqual(result.idx_a, 1)
         self.assertEqual(result.last_equal_idx, 0)
 
+    def test_resync_signs_each_step_once(self):
+        """Each step's input is hashed once across resync and summaries."""
+        steps_a = [_step_io(i, f"a{i}", {"i": i}, {}) for i in range(6)]
+        steps_b = [_step_io(i, f"b{i}", {"i": i}, {}) for i in range(6)]
+
+        with mock.patch.object(
+            first_divergence,
+            "_payloads_digest",
+            wraps=first_divergence._payloads_digest,
+        ) as digest:
+            result = find_first_divergence(
+                _run("a", steps_a), _run("b", steps_b), window=4
+            )
+
+        self.assertEqual(result.status, DivergenceType.OP_DIVERGENCE)
+        # Inputs of the 4 + 4 steps in the resync windows, then outputs of
+        # the 3 + 3 steps in the context windows
+        self.assertEqual(digest.call_count, 14)
+
+    def test_stored_digest_prefix_skips_classification(self):
+        """Steps with equal stored digests are matched without classifying."""
+        steps_a = [
+            replace(_step_io(i, f"s{i}", {"i": i}, {}), events_hash=f"h{i}")
+            for i in range(5)
+        ]
+        steps_b = list(steps_a)
+        steps_b[3] = replace(
+            _step_io(3, "s3", {"i": 3}, {"changed": True}), events_hash="other"
+        )
+
+        with mock.patch.object(
+            first_divergence,
+            "_classify_step_divergence",
+            wraps=first_divergence._classify_step_divergence,
+        ) as classify:
+            result = find_first_divergence(_run("a", steps_a), _run("b", steps_b))
+
+        self.assertEqual(result.status, DivergenceType.OUTPUT_DIVERGENCE)
+        self.assertEqual(result.idx_a, 3)
+        self.assertEqual(result.last_equal_idx, 2)
+        self.assertEqual(classify.call_count, 1)
+
+    def test_each_step_summarized_once(self):
+        """The divergent step's summary is shared with its context window."""
+        steps_a = [_step_io(i, f"s{i}", {"i": i}, {}) for i in range(5)]
+        steps_b = steps_a[:2] + [_step_io(2, "s2", {"i": 2}, {"x": 1})] + steps_a[3:]
+
+        with mock.patch.object(
+            first_divergence,
+            "_make_summary",
+            wraps=first_divergence._make_summary,
+        ) as make_summary:
+            result = find_first_divergence(_run("a", steps_a), _run("b", steps_b))
+
+        self.assertEqual(result.status, DivergenceType.OUTPUT_DIVERGENCE)
+        self.assertIs(result.old_step, result.context_a[2])
+        # 5 distinct steps in A's window, plus B's replaced step
+        self.assertEqual(make_summary.call_count, 6)
+
+    def test_shared_payloads_match_without_hashing(self):
+        """Steps over the same payload objects match before any hashing."""
+        shared = [_step_io(i, f"s{i}", {"i": i}, {"o": i}) for i in range(3)]
+        steps_b = [
+            _step(s.idx, s.name, [_evt(s.idx, e.type, e.payload) for e in s.events])
+            for s in shared
+        ]
+
+        with mock.patch.object(
+            first_divergence,
+            "_payloads_digest",
+            wraps=first_divergence._payloads_digest,
+        ) as digest:
+            result = find_first_divergence(_run("a", shared), _run("b", steps_b))
+
+        self.assertEqual(result.status, DivergenceType.EXACT_MATCH)
+        self.assertEqual(digest.call_count, 0)
+
+    def test_python_equal_payloads_still_canon_compared(self):
+        """1 == 1.0 in Python, but the payloads differ canonically."""
+        run_a = _run("a", [_step_io(0, "s", {"x": 1}, {"y": 1})])
+        run_b = _run("b", [_step_io(0, "s", {"x": 1}, {"y": 1.0})])
+
+        result = find_first_divergence(run_a, run_b)
+
+        self.assertEqual(result.status, DivergenceType.OUTPUT_DIVERGENCE)
+
+    def test_inserted_step_resync_hashes_shared_payloads_once(self):
+        """Copied steps over the same payload objects are hashed once."""
+        steps_a = [_step_io(i, f"s{i}", {"i": i}, {"o": i}) for i in range(4)]
+        copies = [
+            _step(
+                s.idx + 1,
+                s.name,
+                [_evt(s.idx + 1, e.type, e.payload) for e in s.events],
+            )
+            for s in steps_a[1:]
+        ]
+        steps_b = [steps_a[0], _step_io(1, "extra", {"e": 1}, {})] + copies
+
+        with mock.patch.object(
+            first_divergence, "canon", wraps=first_divergence.canon
+        ) as canon_calls:
+            result = find_first_divergence(_run("a", steps_a), _run("b", steps_b))
+
+        self.assertEqual(result.status, DivergenceType.EXTRA_STEPS)
+        self.assertEqual(result.idx_b, 1)
+        # One canon per distinct payload group: inputs of s1..s3 and extra
+        # for the resync, then outputs of the summarized steps
+        hashed = [c.args[0] for c in canon_calls.call_args_list]
+        self.assertEqual(len(hashed), len({tuple(map(id, p)) for p in hashed}))
+
     def test_step_summary_fields(self):
         """StepSummary.to_dict() contains all expected fields."""
         step = _step_io(5, "my_step", {"k": "v"}, {"out": 42})
@@ -0,0 +1,140 @@
+import os
+import tempfile
+import unittest
+
+from forkline.core.replay import ReplayEngine, ReplayStatus
+from forkline.storage import LogStore, SQLiteStore
+
+
+def _record(store: SQLiteStore, run_id: str, answer: str = "world") -> None:
+    store.start_run(run_id)
+    store.start_step(run_id, 0, "plan")
+    store.append_event(run_id, 0, "input", {"prompt": "hello"})
+    store.end_step(run_id, 0)
+    store.start_step(run_id, 1, "execute")
+    store.append_events(
+        run_id,
+        1,
+        [("tool_call", {"name": "search"}), ("output", {"result": answer})],
+    )
+    store.end_step(run_id, 1)
+
+
+def _shape(run):
+    return [
+        (
+            step.idx,
+            step.name,
+            step.input_hash,
+            step.output_hash,
+            step.events_hash,
+            [(e.type, e.payload) for e in step.events],
+        )
+        for step in run.steps
+    ]
+
+
+class LogStoreTest(unittest.TestCase):
+    def test_round_trip_matches_sqlite_store(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with SQLiteStore(path=os.path.join(temp_dir, "f.db")) as sqlite_store:
+                _record(sqlite_store, "run-1")
+                expected = sqlite_store.load_run("run-1")
+
+            with LogStore(path=os.path.join(temp_dir, "logs")) as log_store:
+                _record(log_store, "run-1")
+                loaded = log_store.load_run("run-1")
+
+            self.assertEqual(_shape(expected), _shape(loaded))
+            self.assertEqual(
+                [e.event_id for s in loaded.steps for e in s.events], [1, 2, 3]
+            )
+            self.assertTrue(
+                os.path.exists(
+                    os.path.join(temp_dir, "logs", "runs", "run-1", "events.log")
+                )
+            )
+
+    def test_reopened_store_continues_log(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with LogStore(path=temp_dir) as store:
+                _record(store, "run-1")
+
+            with LogStore(path=temp_dir) as store:
+                store.start_step("run-1", 2, "report")
+                event = store.append_event("run-1", 2, "output", {"done": True})
+                store.end_step("run-1", 2)
+                loaded = store.load_run("run-1")
+
+            self.assertEqual(event.event_id, 4)
+            self.assertEqual(len(loaded.steps), 3)
+            self.assertEqual(loaded.steps[2].events[0].payload, {"done": True})
+
+    def test_close_is_idempotent(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with LogStore(path=temp_dir) as store:
+                _record(store, "run-1")
+                store.close()
+            store.close()
+
+            with LogStore(path=temp_dir) as store:
+                self.assertEqual(len(store.load_run("run-1").steps), 2)
+
+    def test_torn_tail_record_is_dropped(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with LogStore(path=temp_dir) as store:
+                _record(store, "run-1")
+            log_path = os.path.join(temp_dir, "runs", "run-1", "events.log")
+            with open(log_path, "ab") as f:
+                f.write(b"\x00\x00\x01\x00[2,")
+
+            with LogStore(path=temp_dir) as store:
+                self.assertEqual(len(store.load_run("run-1").steps[1].events), 2)
+                store.start_step("run-1", 2, "report")
+                event = store.append_event("run-1", 2, "output", {"done": True})
+                store.end_step("run-1", 2)
+                loaded = store.load_run("run-1")
+
+            self.assertEqual(event.event_id, 4)
+            self.assertEqual(loaded.steps[2].events[0].payload, {"done": True})
+
+    def test_empty_log_loads_steps_without_events(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with LogStore(path=temp_dir) as store:
+                store.start_run("run-1")
+                store.start_step("run-1", 0, "plan")
+                store.end_step("run-1", 0)
+                log_dir = os.path.join(temp_dir, "runs", "run-1")
+                os.makedirs(log_dir)
+                open(os.path.join(log_dir, "events.log"), "wb").close()
+
+                loaded = store.load_run("run-1")
+
+            self.assertEqual(len(loaded.steps), 1)
+            self.assertEqual(loaded.steps[0].events, [])
+
+    def test_replay_engine_compares_log_runs(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with LogStore(path=temp_dir) as store:
+                _record(store, "a")
+                _record(store, "b")
+                _record(store, "c", answer="changed")
+                engine = ReplayEngine(store)
+
+                self.assertEqual(
+                    engine.compare_runs("a", "b").status, ReplayStatus.MATCH
+                )
+                self.assertEqual(
+                    engine.compare_runs("a", "c").status, ReplayStatus.DIVERGED
+                )
+
+    def test_run_id_must_be_a_plain_name(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with LogStore(path=temp_dir) as store:
+                for run_id in ("", "..", "a/b", "a\\b"):
+                    with self.assertRaises(ValueError):
+                        store.start_run(run_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
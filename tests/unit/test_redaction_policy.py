@@ -8,9 +8,13 @@ These tests verify security-critical redaction behavior:
 - Integration with storage boundary
 """
 
+import hashlib
+import sys
 import tempfile
 import unittest
+from unittest import mock
 
+from forkline.core import redaction
 from forkline.core.redaction import (
     RedactionAction,
     RedactionPolicy,
@@ -110,6 +114,35 @@ class TestRedactionPolicy(unittest.TestCase):
         self.assertEqual(len(hash_value), 64)
         self.assertTrue(all(c in "0123456789abcdef" for c in hash_value))
 
+    def test_hash_action_output_is_stable_across_versions(self):
+        """HASH output is pinned: runs recorded by older versions must diff."""
+        policy = RedactionPolicy(
+            rules=[RedactionRule(action=RedactionAction.HASH, key_pattern="email")]
+        )
+
+        redacted = policy.redact("test", {"email": "user@example.com"})
+
+        self.assertEqual(
+            redacted["email"],
+            "hash:" + hashlib.sha256(b"'user@example.com'").hexdigest(),
+        )
+
+    def test_hash_action_hashes_each_distinct_value_once(self):
+        """Repeated secret values reuse the cached digest."""
+        policy = RedactionPolicy(
+            rules=[RedactionRule(action=RedactionAction.HASH, key_pattern="email")]
+        )
+        payload = {"items": [{"email": "a@x.io"}, {"email": "a@x.io"}]}
+
+        with mock.patch.object(
+            redaction.hashlib, "sha256", wraps=hashlib.sha256
+        ) as sha256:
+            first = policy.redact("test", payload)
+            second = policy.redact("test", {"email": "a@x.io"})
+
+        self.assertEqual(sha256.call_count, 1)
+        self.assertEqual(first["items"][1]["email"], second["email"])
+
     def test_key_pattern_matching_is_case_insensitive(self):
         """Key pattern matching should be case-insensitive."""
         policy = RedactionPolicy(
@@ -182,6 +215,47 @@ class TestRedactionPolicy(unittest.TestCase):
         # Should be hashed (first rule), not masked
         self.assertTrue(redacted["secret_key"].startswith("hash:"))
 
+    def test_rule_order_wins_over_match_position(self):
+        """Rule order decides, not where in the key a pattern occurs."""
+        policy = RedactionPolicy(
+            rules=[
+                RedactionRule(action=RedactionAction.DROP, key_pattern="token"),
+                RedactionRule(action=RedactionAction.MASK, key_pattern="api"),
+            ]
+        )
+
+        redacted = policy.redact("test", {"API_TOKEN": "v", "apiVersion": 2})
+
+        self.assertNotIn("API_TOKEN", redacted)
+        self.assertEqual(redacted["apiVersion"], "[REDACTED]")
+
+    def test_rules_are_read_only(self):
+        """Rules are fixed at construction, where the matchers are built."""
+        rules = [RedactionRule(action=RedactionAction.MASK, key_pattern="secret")]
+        policy = RedactionPolicy(rules=rules)
+        rules.append(RedactionRule(action=RedactionAction.MASK, key_pattern="token"))
+
+        self.assertEqual(policy.rules, tuple(rules[:1]))
+        with self.assertRaises(AttributeError):
+            policy.rules.append(rules[1])
+        with self.assertRaises(AttributeError):
+            policy.rules = tuple(rules)
+        self.assertEqual(policy.redact("test", {"token": "t"}), {"token": "t"})
+
+    def test_path_only_rule_matches_any_key(self):
+        """A path-only rule still applies alongside key rules."""
+        policy = RedactionPolicy(
+            rules=[
+                RedactionRule(action=RedactionAction.MASK, key_pattern="secret"),
+                RedactionRule(action=RedactionAction.MASK, path_pattern="env.home"),
+            ]
+        )
+
+        redacted = policy.redact("test", {"env": {"HOME": "/root", "user": "me"}})
+
+        self.assertEqual(redacted["env"]["HOME"], "[REDACTED]")
+        self.assertEqual(redacted["env"]["user"], "me")
+
     def test_nested_dict_redaction(self):
         """Redaction should work recursively on nested dicts."""
         policy = RedactionPolicy(
@@ -244,6 +318,89 @@ class TestRedactionPolicy(unittest.TestCase):
         self.assertEqual(redacted["secret_key"], "[REDACTED]")
         self.assertEqual(redacted["nested"]["secret_key"], "[REDACTED]")
 
+    def test_untouched_subtrees_are_shared(self):
+        """Only containers on the way to a redacted key are copied."""
+        policy = RedactionPolicy(
+            rules=[RedactionRule(action=RedactionAction.MASK, key_pattern="secret")]
+        )
+        payload = {
+            "items": [{"secret": "s", "tags": ["a"]}, {"n": 1}],
+            "meta": {"n": 1},
+        }
+
+        redacted = policy.redact("test", payload)
+
+        self.assertIsNot(redacted, payload)
+        self.assertIsNot(redacted["items"], payload["items"])
+        self.assertIsNot(redacted["items"][0], payload["items"][0])
+        self.assertEqual(redacted["items"][0]["secret"], "[REDACTED]")
+        self.assertIs(redacted["items"][0]["tags"], payload["items"][0]["tags"])
+        self.assertIs(redacted["items"][1], payload["items"][1])
+        self.assertIs(redacted["meta"], payload["meta"])
+        self.assertEqual(payload["items"][0]["secret"], "s")
+
+    def test_payload_without_matches_is_returned_as_is(self):
+        policy = RedactionPolicy(
+            rules=[RedactionRule(action=RedactionAction.MASK, key_pattern="secret")]
+        )
+        payload = {"items": [{"tags": {"a"}}], "meta": {"n": 1}}
+        self.assertIs(policy.redact("test", payload), payload)
+
+    def test_key_order_preserved(self):
+        """Redacted dicts keep the input's key order."""
+        policy = RedactionPolicy(
+            rules=[RedactionRule(action=RedactionAction.MASK, key_pattern="secret")]
+        )
+        payload = {"z": {"x": 1}, "secret": "s", "a": [1], "m": 2}
+
+        redacted = policy.redact("test", payload)
+
+        self.assertEqual(list(redacted), ["z", "secret", "a", "m"])
+
+    def test_deeply_nested_payload(self):
+        """Nesting deeper than the recursion limit is redacted."""
+        policy = RedactionPolicy(
+            rules=[RedactionRule(action=RedactionAction.MASK, key_pattern="secret")]
+        )
+        payload: dict = {"secret": "s"}
+        for _ in range(sys.getrecursionlimit() + 100):
+            payload = {"child": [payload]}
+
+        redacted = policy.redact("test", payload)
+
+        node = redacted
+        while "child" in node:
+            node = node["child"][0]
+        self.assertEqual(node, {"secret": "[REDACTED]"})
+
+    def test_cyclic_payload_raises(self):
+        """A payload that contains itself is rejected instead of walked forever."""
+        policy = RedactionPolicy(
+            rules=[RedactionRule(action=RedactionAction.MASK, key_pattern="secret")]
+        )
+        payload: dict = {"secret": "s"}
+        payload["self"] = payload
+        nested: dict = {"items": [{"n": 1}]}
+        nested["items"][0]["back"] = nested["items"]
+
+        for cyclic in (payload, nested):
+            with self.assertRaises(ValueError):
+                policy.redact("test", cyclic)
+
+    def test_shared_subtree_is_redacted_everywhere(self):
+        """A subtree reached from two parents is not mistaken for a cycle."""
+        policy = RedactionPolicy(
+            rules=[RedactionRule(action=RedactionAction.MASK, key_pattern="secret")]
+        )
+        shared = {"secret": "s", "n": 1}
+        payload = {"a": shared, "b": [shared, shared]}
+
+        redacted = policy.redact("test", payload)
+
+        expected = {"secret": "[REDACTED]", "n": 1}
+        self.assertEqual(redacted, {"a": expected, "b": [expected, expected]})
+        self.assertEqual(shared["secret"], "s")
+
     def test_determinism(self):
         """Same input must always produce same output."""
         policy = RedactionPolicy(
@@ -277,6 +434,15 @@ class TestDefaultRedactionPolicy(unittest.TestCase):
         self.assertIsInstance(policy, RedactionPolicy)
         self.assertGreater(len(policy.rules), 0)
 
+    def test_default_policy_shares_only_compiled_rules(self):
+        """Each call returns a new policy; only immutable state is shared."""
+        first, second = create_default_policy(), create_default_policy()
+
+        self.assertIsNot(first, second)
+        self.assertIs(first.rules, second.rules)
+        self.assertIs(first._matchers, second._matchers)
+        self.assertIsNot(first._hash_cache, second._hash_cache)
+
     def test_default_policy_redacts_api_keys(self):
         """Default policy should redact API keys."""
         policy = create_default_policy()
@@ -534,6 +700,20 @@ class TestRecorderIntegration(unittest.TestCase):
             self.assertEqual(events[0]["payload"], events[1]["payload"])
             self.assertEqual(events[1]["payload"], events[2]["payload"])
 
+    def test_recorder_rejects_cyclic_payload(self):
+        """A self-referencing payload fails in redaction and stores nothing."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = f"{tmpdir}/test.db"
+            with RunRecorder(db_path=db_path) as recorder:
+                run_id = recorder.start_run(entrypoint="test.py")
+
+                payload: dict = {"data": "value"}
+                payload["self"] = payload
+
+                with self.assertRaises(ValueError):
+                    recorder.log_event(run_id, "test", payload=payload)
+                self.assertEqual(recorder.get_events(run_id), [])
+
 
 if __name__ == "__main__":
     unittest.main()
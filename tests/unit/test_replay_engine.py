@@ -17,6 +17,7 @@ Test Philosophy:
 import os
 import tempfile
 import unittest
+from dataclasses import replace
 from typing import List
 
 from forkline import (
@@ -233,6 +234,47 @@ class TestDeepCompare(unittest.TestCase):
         diffs = deep_compare(d1, d2, ignore_fields={"ts"})
         self.assertEqual(len(diffs), 0)
 
+    def test_diffs_follow_key_and_index_order(self):
+        """Missing keys and nested diffs interleave in sorted key order."""
+        d1 = {"a": [1, {"x": 1}], "b": 1, "c": {"y": 1}}
+        d2 = {"a": [2, {"x": 2}, 3], "c": {"y": 2}, "d": 0}
+        diffs = deep_compare(d1, d2)
+        self.assertEqual(
+            [d.path for d in diffs],
+            ["a.(length)", "a[0]", "a[1].x", "b", "c.y", "d"],
+        )
+
+    def test_paths_under_prefix_and_at_root(self):
+        """Paths join the prefix, non-str keys and indexes as before."""
+        diffs = deep_compare({1: [{"x": 1}]}, {1: [{"x": 2}]}, "payload")
+        self.assertEqual([d.path for d in diffs], ["payload.1[0].x"])
+        diffs = deep_compare([[1], [1, 2]], [[2], [1]])
+        self.assertEqual([d.path for d in diffs], ["[0][0]", "[1].(length)"])
+
+    def test_equal_leaves_of_different_types_differ(self):
+        """Leaves must match in type as well as value; NaN never matches."""
+        d1 = {"a": [1, True, float("nan"), "s"]}
+        d2 = {"a": [1.0, 1, float("nan"), "s"]}
+        diffs = deep_compare(d1, d2)
+        self.assertEqual([d.path for d in diffs], ["a[0]", "a[1]", "a[2]"])
+        self.assertEqual(diffs[0].expected, "type:int")
+
+    def test_shared_objects_are_not_walked(self):
+        """The same object on both sides is equal without a walk."""
+        shared = {"config": [float("nan"), {"x": 1}]}
+        self.assertEqual(deep_compare(shared, shared), [])
+        diffs = deep_compare({"a": shared, "b": 1}, {"a": shared, "b": 2})
+        self.assertEqual([d.path for d in diffs], ["b"])
+
+    def test_deep_nesting(self):
+        """Nesting deeper than the recursion limit is compared."""
+        d1, d2 = 1, 2
+        for _ in range(5000):
+            d1, d2 = {"k": d1}, {"k": d2}
+        diffs = deep_compare(d1, d2)
+        self.assertEqual(len(diffs), 1)
+        self.assertEqual(diffs[0].path, ".".join(["k"] * 5000))
+
 
 # =============================================================================
 # Event Comparison Tests
@@ -374,6 +416,23 @@ class TestCompareSteps(unittest.TestCase):
         self.assertEqual(divergence.divergence_type, "event_payload_mismatch")
         self.assertEqual(divergence.event_idx, 1)  # Second event
 
+    def test_matching_events_hash_skips_event_compare(self):
+        """Equal recorded event digests are trusted without a deep compare."""
+        events1 = [make_event(1, "run1", 0, "input", {"x": 1})]
+        events2 = [make_event(2, "run2", 0, "input", {"x": 2})]
+        s1 = replace(make_step(1, "run1", 0, "process", events1), events_hash="h")
+        s2 = replace(make_step(2, "run2", 0, "process", events2), events_hash="h")
+
+        matched, divergence = compare_steps(s1, s2)
+        self.assertTrue(matched)
+        self.assertIsNone(divergence)
+
+        # Different digests still run the full comparison
+        s2 = replace(s2, events_hash="other")
+        matched, divergence = compare_steps(s1, s2)
+        self.assertFalse(matched)
+        self.assertEqual(divergence.divergence_type, "event_payload_mismatch")
+
 
 # =============================================================================
 # ReplayEngine Tests
@@ -574,6 +633,13 @@ class TestReplayEngine(unittest.TestCase):
 
         self.assertEqual(result.status, ReplayStatus.MATCH)
 
+    def test_validate_missing_run(self):
+        """validate_run should report a missing run as not found."""
+        result = self.engine.validate_run("nonexistent")
+
+        self.assertEqual(result.status, ReplayStatus.ORIGINAL_NOT_FOUND)
+        self.assertEqual(result.replay_run_id, "nonexistent")
+
     def test_compare_loaded_runs(self):
         """compare_loaded_runs should work with in-memory runs."""
         run1 = make_simple_run("run-1")
@@ -612,6 +678,87 @@ class TestReplayEngine(unittest.TestCase):
         self.assertEqual(result1.steps_compared, result2.steps_compared)
         self.assertEqual(result1.total_events_compared, result2.total_events_compared)
 
+    def test_stored_nan_payloads_match(self):
+        """Identically stored NaN payloads match; separate NaN values differ."""
+        for run_id in ("run-1", "run-2"):
+            self.store.start_run(run_id)
+            self.store.start_step(run_id, 0, "measure")
+            self.store.append_event(run_id, 0, "output", {"v": float("nan")})
+            self.store.end_step(run_id, 0)
+
+        # Equal events_hash: the events are not compared at all
+        original, replayed = (self.store.load_run(r) for r in ("run-1", "run-2"))
+        self.assertIsNotNone(original.steps[0].events_hash)
+        self.assertEqual(
+            self.engine.compare_runs("run-1", "run-2").status, ReplayStatus.MATCH
+        )
+
+        # Without digests, deep_compare() treats a value as equal to itself,
+        # and json.loads() returns one shared NaN object
+        unhashed = [
+            replace(run, steps=[replace(run.steps[0], events_hash=None)])
+            for run in (original, replayed)
+        ]
+        result = self.engine.compare_loaded_runs(*unhashed)
+        self.assertEqual(result.status, ReplayStatus.MATCH)
+
+        # NaN values built separately still differ, as NaN != NaN
+        s1 = make_step(
+            1,
+            "run1",
+            0,
+            "measure",
+            [make_event(1, "run1", 0, "output", {"v": float("nan")})],
+        )
+        s2 = make_step(
+            2,
+            "run2",
+            0,
+            "measure",
+            [make_event(2, "run2", 0, "output", {"v": float("nan")})],
+        )
+        matched, divergence = compare_steps(s1, s2)
+        self.assertFalse(matched)
+        self.assertEqual(divergence.divergence_type, "event_payload_mismatch")
+
+    def test_store_with_only_load_run(self):
+        """Stores without load_run_lazy are loaded eagerly."""
+        self._record_run(make_multi_step_run("run-1"))
+        self._record_run(make_simple_run("run-2"))
+
+        class EagerStore:
+            def __init__(self, store: SQLiteStore) -> None:
+                self.load_run = store.load_run
+
+        engine = ReplayEngine(store=EagerStore(self.store))
+        expected = self.engine.compare_runs("run-1", "run-2")
+        result = engine.compare_runs("run-1", "run-2")
+        eager = self.engine.compare_runs("run-1", "run-2", lazy=False)
+
+        self.assertEqual(result.status, ReplayStatus.DIVERGED)
+        self.assertEqual(result.divergence, expected.divergence)
+        self.assertEqual(eager.divergence, expected.divergence)
+        self.assertEqual(
+            engine.compare_runs("missing", "run-2").status,
+            ReplayStatus.ORIGINAL_NOT_FOUND,
+        )
+
+    def test_compare_runs_uses_overridden_load_run(self):
+        """A subclass overriding load_run() is used by lazy and eager compares."""
+        self._record_run(make_simple_run("run-1"))
+        loaded = []
+
+        class RecordingEngine(ReplayEngine):
+            def load_run(self, run_id):
+                loaded.append(run_id)
+                return super().load_run(run_id)
+
+        engine = RecordingEngine(store=self.store)
+        for lazy in (True, False):
+            result = engine.compare_runs("run-1", "run-1", lazy=lazy)
+            self.assertEqual(result.status, ReplayStatus.MATCH)
+        self.assertEqual(loaded, ["run-1"] * 4)
+
 
 # =============================================================================
 # ReplayContext Tests
@@ -657,6 +804,14 @@ class TestReplayContext(unittest.TestCase):
         self.assertIsNotNone(step)
         self.assertEqual(step.idx, 2)
 
+    def test_get_step_by_name_returns_first_match(self):
+        """Duplicate step names resolve to the first step; unknown to None."""
+        steps = [make_step(i + 1, "run-1", i, "retry", []) for i in range(3)]
+        ctx = ReplayContext(make_run("run-1", steps))
+
+        self.assertEqual(ctx.get_step_by_name("retry").idx, 0)
+        self.assertIsNone(ctx.get_step_by_name("missing"))
+
     def test_get_event(self):
         """Should retrieve specific event."""
         run = make_multi_step_run("run-1")
@@ -867,6 +1022,13 @@ class TestDivergencePoint(unittest.TestCase):
         summary = divergence.summary()
         self.assertIn("+7 more", summary)
 
+    def test_large_field_values_are_truncated(self):
+        """Large container values render as the same truncated repr."""
+        values = [list(range(1000)), tuple(range(1000)), dict.fromkeys(range(1000))]
+        for value in values:
+            text = str(FieldDiff("payload", value, None))
+            self.assertIn(repr(value)[:47] + "...", text)
+
 
 # =============================================================================
 # ReplayPolicy Tests
@@ -954,6 +1116,15 @@ class TestDivergence(unittest.TestCase):
         self.assertEqual(result["expected"], "expected_value")
         self.assertEqual(result["actual"], "actual_value")
 
+    def test_field_diff_to_dict(self):
+        """FieldDiff should serialize to a flat dict."""
+        diff = FieldDiff(path="payload.result", expected="foo", actual="bar")
+
+        self.assertEqual(
+            diff.to_dict(),
+            {"path": "payload.result", "expected": "foo", "actual": "bar"},
+        )
+
     def test_divergence_point_to_divergence(self):
         """DivergencePoint should convert to new Divergence format."""
         from forkline.core.replay import DivergenceReason
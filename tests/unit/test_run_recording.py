@@ -5,6 +5,7 @@ import sqlite3
 import tempfile
 import unittest
 
+from forkline.core.redaction import RedactionPolicy
 from forkline.storage.recorder import RunRecorder
 
 
@@ -78,6 +79,72 @@ class TestRunRecorder(unittest.TestCase):
             self.assertEqual(events[0]["payload"], {"prompt": "hello"})
             self.assertEqual(events[1]["payload"], {"result": "world"})
 
+    def test_log_events_batch_preserves_order_and_ids(self):
+        """Batched events get sequential ids and read back like log_event."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, "test.db")
+            recorder = RunRecorder(db_path=db_path)
+
+            run_id = recorder.start_run(entrypoint="test.py")
+            first_id = recorder.log_event(run_id, "input", {"prompt": "hello"})
+
+            event_ids = recorder.log_events(
+                run_id,
+                [
+                    ("tool_call", {"name": "search", "api_key": "sk-123"}),
+                    ("output", {"result": "world"}),
+                ],
+            )
+
+            self.assertEqual(event_ids, [first_id + 1, first_id + 2])
+            self.assertEqual(recorder.log_events(run_id, []), [])
+
+            events = recorder.get_events(run_id)
+            self.assertEqual([e["event_id"] for e in events], [first_id] + event_ids)
+            self.assertEqual(
+                [e["type"] for e in events], ["input", "tool_call", "output"]
+            )
+            # Batched payloads are redacted too
+            self.assertEqual(events[1]["payload"]["api_key"], "[REDACTED]")
+            self.assertEqual(events[2]["payload"], {"result": "world"})
+
+    def test_log_event_raw_stores_payload_verbatim(self):
+        """Pre-serialized payloads are stored as given, without redaction."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, "test.db")
+            source = RunRecorder(db_path=db_path)
+            run_a = source.start_run(entrypoint="test.py")
+            source.log_event(run_a, "input", {"api_key": "sk-123", "n": 1})
+
+            run_b = source.start_run(entrypoint="test.py")
+            with sqlite3.connect(db_path) as conn:
+                (payload_json,) = conn.execute(
+                    "SELECT payload FROM events WHERE run_id = ?", (run_a,)
+                ).fetchone()
+            source.log_event_raw(run_b, "input", payload_json)
+            source.log_event_raw(run_b, "output", b'{"result": "ok"}')
+
+            events = source.get_events(run_b)
+            self.assertEqual(events[0]["payload"], {"api_key": "[REDACTED]", "n": 1})
+            self.assertEqual(events[1]["payload"], {"result": "ok"})
+
+    def test_empty_policy_stores_payload_unchanged(self):
+        """A policy with no rules records payloads as-is."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, "test.db")
+            recorder = RunRecorder(
+                db_path=db_path, redaction_policy=RedactionPolicy(rules=[])
+            )
+            self.assertTrue(recorder.redaction_policy.is_noop)
+
+            run_id = recorder.start_run(entrypoint="test.py")
+            payload = {"token": "t", "nested": [{"password": "p"}]}
+            recorder.log_event(run_id, "input", payload)
+            recorder.log_events(run_id, [("output", payload)])
+
+            events = recorder.get_events(run_id)
+            self.assertEqual([e["payload"] for e in events], [payload, payload])
+
     def test_end_run_updates_status(self):
         """Test that ending a run updates status and ended_at."""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -192,6 +259,83 @@ class TestRunRecorder(unittest.TestCase):
             run = recorder.get_run(explicit_id)
             self.assertEqual(run["run_id"], explicit_id)
 
+    def test_context_manager_closes_connection(self):
+        """Closing the recorder closes its connection after committing."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, "test.db")
+            with RunRecorder(db_path=db_path) as recorder:
+                run_id = recorder.start_run(entrypoint="test.py")
+                recorder.log_event(run_id, "input", {"x": 1})
+
+            with self.assertRaises(sqlite3.ProgrammingError):
+                recorder.get_run(run_id)
+
+            with RunRecorder(db_path=db_path) as reopened:
+                self.assertIsNotNone(reopened.get_run(run_id))
+                self.assertEqual(len(reopened.get_events(run_id)), 1)
+
+    def test_wal_is_checkpointed_on_end_run(self):
+        """The database uses WAL, and end_run folds the log back in."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, "test.db")
+            with RunRecorder(db_path=db_path) as recorder:
+                run_id = recorder.start_run(entrypoint="test.py")
+                recorder.log_event(run_id, "input", {"x": 1})
+
+                conn = sqlite3.connect(db_path)
+                mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+                conn.close()
+                self.assertEqual(mode, "wal")
+                self.assertGreater(os.path.getsize(db_path + "-wal"), 0)
+
+                recorder.end_run(run_id)
+                self.assertEqual(os.path.getsize(db_path + "-wal"), 0)
+
+    def test_get_events_iter_matches_get_events(self):
+        """Streaming events in batches yields the same events in order."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, "test.db")
+            with RunRecorder(db_path=db_path) as recorder:
+                run_id = recorder.start_run(entrypoint="test.py")
+                other_id = recorder.start_run(entrypoint="other.py")
+                for i in range(7):
+                    recorder.log_event(run_id, "output", {"i": i})
+                    recorder.log_event(other_id, "output", {"i": -i})
+
+                streamed = list(recorder.get_events_iter(run_id, batch_size=3))
+                self.assertEqual(streamed, recorder.get_events(run_id))
+                self.assertEqual([e["payload"]["i"] for e in streamed], list(range(7)))
+                self.assertEqual(list(recorder.get_events_iter("missing")), [])
+
+    def test_transaction_commits_calls_together(self):
+        """Calls inside transaction() commit together or not at all."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, "test.db")
+            with RunRecorder(db_path=db_path) as recorder:
+                run_id = recorder.start_run(entrypoint="test.py")
+
+                with recorder.transaction():
+                    first = recorder.log_event(run_id, "input", {"i": 0})
+                    with recorder.transaction():
+                        second = recorder.log_event(run_id, "output", {"i": 1})
+                    recorder.end_run(run_id)
+
+                    # Nothing is visible to other connections before commit
+                    conn = sqlite3.connect(db_path)
+                    count = conn.execute("SELECT COUNT(*) FROM events").fetchone()
+                    conn.close()
+                    self.assertEqual(count[0], 0)
+
+                self.assertEqual(second, first + 1)
+                self.assertEqual(len(recorder.get_events(run_id)), 2)
+                self.assertEqual(recorder.get_run(run_id)["status"], "success")
+
+                with self.assertRaises(RuntimeError):
+                    with recorder.transaction():
+                        recorder.log_event(run_id, "input", {"i": 2})
+                        raise RuntimeError("abort")
+                self.assertEqual(len(recorder.get_events(run_id)), 2)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,8 +1,11 @@
 import os
+import sqlite3
 import tempfile
 import unittest
+from unittest import mock
 
 from forkline.core import replay
+from forkline.core.canon import canon, sha256_hex
 from forkline.storage import SQLiteStore
 from forkline.tracer import Tracer
 
@@ -50,6 +53,191 @@ class SmokeTest(unittest.TestCase):
             self.assertEqual("inner", loaded.steps[1].name)
             self.assertEqual(1, len(loaded.steps[1].events))
 
+    def test_append_events_batch(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "forkline.db")
+            store = SQLiteStore(path=db_path)
+            store.start_run("run-1")
+            store.start_step("run-1", 0, "plan")
+
+            events = store.append_events(
+                "run-1",
+                0,
+                [("input", {"prompt": "hello"}), ("output", {"result": "world"})],
+            )
+            store.end_step("run-1", 0)
+
+            self.assertEqual(2, len(events))
+            self.assertEqual(events[0].event_id + 1, events[1].event_id)
+            self.assertEqual([], store.append_events("run-1", 0, []))
+
+            loaded = store.load_run("run-1")
+            self.assertEqual(events, loaded.steps[0].events)
+
+    def test_append_event_returns_stored_event(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "forkline.db")
+            with SQLiteStore(path=db_path) as store:
+                store.start_run("run-1")
+                store.start_step("run-1", 0, "plan")
+                first = store.append_event("run-1", 0, "input", {"prompt": "hi"})
+                second = store.append_event("run-1", 0, "output", {"result": 1})
+                store.end_step("run-1", 0)
+
+                loaded = store.load_run("run-1")
+                self.assertEqual([first, second], loaded.steps[0].events)
+
+    def test_database_uses_wal_journal(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "forkline.db")
+            SQLiteStore(path=db_path)
+
+            conn = sqlite3.connect(db_path)
+            mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+            conn.close()
+            self.assertEqual("wal", mode)
+
+    def test_step_event_lookup_uses_index_without_sort(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "forkline.db")
+            SQLiteStore(path=db_path).close()
+
+            conn = sqlite3.connect(db_path)
+            plan = " ".join(
+                row[3]
+                for row in conn.execute(
+                    "EXPLAIN QUERY PLAN "
+                    "SELECT event_id, payload_json FROM events "
+                    "WHERE run_id = ? AND step_idx = ? ORDER BY event_id ASC",
+                    ("run-1", 0),
+                )
+            )
+            conn.close()
+            self.assertIn("idx_events_run_step", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_unknown_durability_rejected(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "forkline.db")
+            with self.assertRaises(ValueError):
+                SQLiteStore(path=db_path, durability="yolo")
+
+    def test_context_manager_closes_connection(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "forkline.db")
+            with SQLiteStore(path=db_path) as store:
+                store.start_run("run-1")
+                self.assertIsNotNone(store.load_run("run-1"))
+
+            with self.assertRaises(sqlite3.ProgrammingError):
+                store.load_run("run-1")
+
+            # Data written through the shared connection was committed
+            with SQLiteStore(path=db_path) as reopened:
+                self.assertIsNotNone(reopened.load_run("run-1"))
+
+    def test_close_is_idempotent(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "forkline.db")
+            with SQLiteStore(path=db_path) as store:
+                store.start_run("run-1")
+                store.close()
+            store.close()
+
+    def test_step_hashes_recorded_on_end_step(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "forkline.db")
+            with SQLiteStore(path=db_path) as store:
+                store.start_run("run-1")
+                store.start_step("run-1", 0, "plan")
+                store.append_event("run-1", 0, "input", {"prompt": "caf\u00e9"})
+                store.append_events(
+                    "run-1",
+                    0,
+                    [("tool_call", {"name": "x"}), ("output", {"result": [1, 2.5]})],
+                )
+                store.end_step("run-1", 0)
+
+                step = store.load_run("run-1").steps[0]
+                inputs = [e.payload for e in step.events if e.type == "input"]
+                outputs = [e.payload for e in step.events if e.type == "output"]
+                self.assertEqual(sha256_hex(canon(inputs)), step.input_hash)
+                self.assertEqual(sha256_hex(canon(outputs)), step.output_hash)
+
+    def test_events_hash_tracks_stored_events(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "forkline.db")
+            with SQLiteStore(path=db_path) as store:
+                runs = (("a", "caf\u00e9"), ("b", "caf\u00e9"), ("c", "cafe\u0301"))
+                for run_id, value in runs:
+                    store.start_run(run_id)
+                    store.start_step(run_id, 0, "plan")
+                    store.append_event(run_id, 0, "input", {"value": value})
+                    store.end_step(run_id, 0)
+
+                a, b, c = (store.load_run(r).steps[0] for r in ("a", "b", "c"))
+                self.assertIsNotNone(a.events_hash)
+                self.assertEqual(a.events_hash, b.events_hash)
+                # NFC and NFD canonicalize alike but are stored differently
+                self.assertEqual(a.input_hash, c.input_hash)
+                self.assertNotEqual(a.events_hash, c.events_hash)
+
+    def test_late_event_clears_step_hashes(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "forkline.db")
+            with SQLiteStore(path=db_path) as store:
+                store.start_run("run-1")
+                store.start_step("run-1", 0, "plan")
+                store.append_event("run-1", 0, "input", {"prompt": "hello"})
+                store.end_step("run-1", 0)
+                store.append_event("run-1", 0, "input", {"prompt": "again"})
+
+                step = store.load_run("run-1").steps[0]
+                self.assertIsNone(step.input_hash)
+                self.assertIsNone(step.output_hash)
+                self.assertIsNone(step.events_hash)
+
+    def test_second_writer_leaves_step_hashes_null(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "forkline.db")
+            with SQLiteStore(path=db_path) as a, SQLiteStore(path=db_path) as b:
+                a.start_run("run-1")
+                a.start_step("run-1", 0, "plan")
+                a.append_event("run-1", 0, "input", {"prompt": "hello"})
+                b.append_event("run-1", 0, "output", {"result": "from b"})
+                a.end_step("run-1", 0)
+
+                step = a.load_run("run-1").steps[0]
+                self.assertEqual(len(step.events), 2)
+                self.assertIsNone(step.input_hash)
+                self.assertIsNone(step.output_hash)
+                self.assertIsNone(step.events_hash)
+
+    def test_lazy_run_loads_events_on_access(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "forkline.db")
+            with SQLiteStore(path=db_path) as store:
+                store.start_run("run-1")
+                for idx, name in enumerate(("plan", "execute", "report")):
+                    store.start_step("run-1", idx, name)
+                    store.append_event("run-1", idx, "output", {"idx": idx})
+                    store.end_step("run-1", idx)
+                expected = store.load_run("run-1")
+
+                with mock.patch.object(
+                    store, "_load_events", wraps=store._load_events
+                ) as load_events:
+                    lazy = store.load_run_lazy("run-1")
+                    self.assertEqual(len(lazy.steps), 3)
+                    self.assertEqual(lazy.steps[1], expected.steps[1])
+                    self.assertEqual(lazy.steps[-1], expected.steps[-1])
+                    self.assertEqual(load_events.call_count, 2)
+
+                    self.assertEqual(list(lazy.steps), expected.steps)
+                    self.assertEqual(load_events.call_count, 3)
+
+                self.assertIsNone(store.load_run_lazy("missing"))
+
 
 if __name__ == "__main__":
     unittest.main()